@@ -2,6 +2,7 @@
 import { SimpleChart } from "@/components/charts/SimpleChart";
 import CustomChart from "@/components/charts/CustomChart";
 import { useQuery } from "@tanstack/react-query";
+import { fetchAllAccidents } from "@/helpers/fetchAccidents";
 type Props = {};
 
 export default function Page({}: Props) {
@@ -11,10 +12,7 @@ export default function Page({}: Props) {
     error,
   } = useQuery({
     queryKey: ["accidents"],
-    queryFn: async () => {
-      const response = await fetch("http://127.0.0.1:8080/api/v1/accident/all");
-      return await response.json();
-    },
+    queryFn: fetchAllAccidents,
   });
   return (
     <>
@@ -11,6 +11,23 @@ type FormProps = {
   video: FileList | null;
 };
 
+const API_BASE = "http://127.0.0.1:8080/api/v1/public";
+
+// Upload analysis runs as a background job on the server, poll until it ends
+const waitForJob = async (jobId: string) => {
+  while (true) {
+    const response = await fetch(`${API_BASE}/jobs/${jobId}`);
+    const job = await response.json();
+
+    if (job.status === "done") return job.result;
+    if (job.status === "failed" || !response.ok) {
+      throw new Error(job.error || job.message || "Analysis failed");
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+  }
+};
+
 export default function InputForm() {
   const router = useRouter();
 
@@ -39,19 +56,17 @@ export default function InputForm() {
     formData.append("video", data.video[0]);
 
     try {
-      const response = await fetch(
-        "http://127.0.0.1:8080/api/v1/public/upload-video",
-        {
-          method: "POST",
-          body: formData,
-        }
-      );
-
-      const resData = await response.json();
+      const response = await fetch(`${API_BASE}/upload-video`, {
+        method: "POST",
+        body: formData,
+      });
+
+      const queued = await response.json();
+      const resData = queued.jobId ? await waitForJob(queued.jobId) : queued;
       setResult(resData);
 
       if (resData.status === "success") {
-        const videoPath = `http://127.0.0.1:8080/api/v1/public/video/${resData.video}`;
+        const videoPath = `${API_BASE}/video/${resData.video}`;
         setVideoUrl(videoPath);
       }
     } catch (error) {
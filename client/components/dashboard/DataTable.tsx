@@ -11,6 +11,7 @@ import {
 
 import Link from "next/link";
 import { ArrowUpRight } from "lucide-react";
+import { fetchAllAccidents } from "@/helpers/fetchAccidents";
 
 /* ---------- TYPE ---------- */
 type Accident = {
@@ -30,8 +31,7 @@ export default function DataTable() {
 
   /* ---------- FETCH REAL DATA ---------- */
   useEffect(() => {
-    fetch("http://127.0.0.1:8080/api/v1/accident/all")
-      .then((res) => res.json())
+    fetchAllAccidents()
       .then((res) => {
         setData(res.datas || []);
         setLoading(false);
@@ -0,0 +1,24 @@
+const ACCIDENTS_URL = "http://127.0.0.1:8080/api/v1/accident/all";
+const PAGE_SIZE = 500; // the server's maximum page size
+
+/* The list endpoint is paginated: follow next_cursor until the last page */
+export async function fetchAllAccidents() {
+  const datas: any[] = [];
+  let cursor: string | null = null;
+
+  do {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (cursor) params.set("cursor", cursor);
+
+    const response = await fetch(`${ACCIDENTS_URL}?${params}`);
+    if (!response.ok) {
+      throw new Error(`Failed to fetch accidents: HTTP ${response.status}`);
+    }
+
+    const page = await response.json();
+    datas.push(...(page.datas || []));
+    cursor = page.next_cursor;
+  } while (cursor);
+
+  return { status: "success", datas };
+}
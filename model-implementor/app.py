@@ -1,124 +1,218 @@
+import argparse
 import asyncio
 import numpy as np
 from ultralytics import YOLO
 import cv2
 import cvzone
 import math
-import time
-from modules.sort import *
-from services.apis import post_accident_data, send_mail_async_final
-from geopy.geocoders import Nominatim
-from modules.send_mail_async import send_mail_async
+from modules.tracker import VectorSort
+from modules.events import EventManager
+from modules.pipeline import Pipeline
+from modules.sinks import SINKS, NullSink, make_sink
+from services.apis import api, mail_outbox, post_accident_batch
+from services.outbox import DurableOutbox
+from modules.geocode import locate
 import base64
 
-# Importing the model
-model = YOLO('models/i1-yolov8s.pt')
-# model = YOLO('models/current.pt')
-
-# Importing the video
-cap = cv2.VideoCapture("./assets/car-crash.mov")
-
-
-async def main():
-    emailDebounceTime = 5  # Time in seconds to wait before sending another email
-    imageSaveDebounceTime = 5
-    isSendMail = False
-
-    # Implementing Tracker Code...
-    tracker = Sort(max_age=20, min_hits=3, iou_threshold=0.3)
-    totalAccidents = []
-    tempConf = 0
-    lastEmailSentTime = 0
-    lastImageSavedTime = 0
-    imageCount = 0
-    task = None
-
-    location = Nominatim(user_agent="iteration1-accident-detection-system", timeout=10)
-    getLoc = location.reverse("28.236758299999998, 83.9960459255522")
-
-    print(getLoc.raw)
-    while True:
-        success, img = cap.read()
-        results = model(img, stream=True)
-        detections = np.empty((0, 5))
-
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                x1, y1, x2, y2 = box.xyxy[0]
-                x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                w, h = x2 - x1, y2 - y1
-
-                conf = math.ceil((box.conf[0] * 100)) / 100
-                tempConf = conf
-
-                if float(tempConf) > 0.4:
-                    cvzone.cornerRect(img, (x1, y1, w, h))
-                    cvzone.putTextRect(img, f'Accident {conf}', (max(0, x1), max(35, y1)), colorR=(0, 165, 255))
-                    currentArray = np.array([x1, y1, x2, y2, conf])
-                    detections = np.vstack((detections, currentArray))
-
-                    # if (time.time() - lastEmailSentTime) > emailDebounceTime and isSendMail == False:
-                    #     lastEmailSentTime = time.time()
-                    #     isSendMail = True
-                    #     task = asyncio.create_task(send_mail_async())
-
-        trackerResults = tracker.update(detections)
-
-        for result in trackerResults:
-            x1,y1,x2,y2,id = result
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            id = int(id)
-            w, h = x2 - x1, y2 - y1
-            if totalAccidents.count(id) == 0:
-
-                if getLoc is not None:
-                    # pass
-                    _, frame_encoded = cv2.imencode('.jpg', img)
-                    frame_base64 = base64.b64encode(frame_encoded).decode('utf-8')
-                    data = {
-                        "address": getLoc.address,
-                        "city": getLoc.raw.get("address", {}).get("city"),
-                        "latitude": getLoc.latitude,
-                        "longitude": getLoc.longitude,
-                        "severityInPercentage": tempConf * 100,
-                        "severity": "Moderate",
-                        "frame": frame_base64
-                    }
-                    task = asyncio.create_task(send_mail_async_final(getLoc.latitude, getLoc.longitude, str(tempConf * 100), getLoc.address))
-                    task1 = asyncio.create_task(post_accident_data(data))
-                    # if response.status_code == 200:
-                    #     print("Request successful. 🔥🔥🔥🔥🔥")
-                    #     print(response.json())
-                    # else:
-                    #     print(f"Error ❌❌❌❌❌❌: {response.status_code}\n{response.text}")
-                cvzone.cornerRect(img, (x1, y1, w, h), colorR=(255, 0, 255))
-                cvzone.putTextRect(img, f'{id}', (max(0, x1), max(35, y1)))
-                cx, cy = x1 + w // 2, y1 + h // 2
-                cv2.circle(img, (cx, cy), 5, (255, 0, 255), cv2.FILLED)
-                totalAccidents.append(id)
-
-        # if(float(tempConf) > 0.4):
-        #     if (time.time() - lastEmailSentTime) > emailDebounceTime and isSendMail == False:
-        #         lastEmailSentTime = time.time()
-        #         send_mail()
-        #         isSendMail = True
-
-        # Displaying the video
-        cv2.imshow("Video Capture", img)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-        await asyncio.sleep(0.01)
-
-    if task & task1 is not None:
-        await task, task1
-    # if task is not None:
-    #     await task
+DEFAULT_MODEL = "models/i1-yolov8s.pt"
+DEFAULT_SOURCE = "./assets/car-crash.mov"
+DEFAULT_LOCATION = (28.236758299999998, 83.9960459255522)
 
-if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
+QUEUE_SIZE = 4  # frames in flight between two stages
+REPORT_EVERY_S = 5
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Edge accident detector")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="video file, stream URL or camera index")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="YOLO weights")
+    parser.add_argument("--sink", choices=SINKS, default="window", help="where annotated frames go; none = headless")
+    parser.add_argument("--output", default="annotated.mp4", help="output path for --sink file")
+    parser.add_argument("--mjpeg-port", type=int, default=8090, help="port for --sink mjpeg")
+    parser.add_argument("--lat", type=float, default=DEFAULT_LOCATION[0], help="camera latitude")
+    parser.add_argument("--lon", type=float, default=DEFAULT_LOCATION[1], help="camera longitude")
+    return parser.parse_args(argv)
+
+
+def open_source(source):
+    # "0", "1", ... are local cameras
+    return cv2.VideoCapture(int(source) if source.isdigit() else source)
+
+
+def parse_detections(result, threshold=0.4):
+    """(N, 5) [x1, y1, x2, y2, conf] above threshold."""
+    detections = np.empty((0, 5))
+
+    for box in result.boxes:
+        x1, y1, x2, y2 = box.xyxy[0]
+        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+
+        conf = math.ceil((box.conf[0] * 100)) / 100
+
+        if float(conf) > threshold:
+            detections = np.vstack((detections, np.array([x1, y1, x2, y2, conf])))
+
+    return detections
+
+
+def detect(model, img):
+    """Inference stage (executor thread): YOLO boxes above the confidence cut."""
+    detections = np.empty((0, 5))
+    for r in model(img, stream=True):
+        detections = parse_detections(r)
+    return detections
+
+
+def accident_payload(getLoc, confidence, source, frame_base64):
+    return {
+        "address": getLoc.address,
+        "city": getLoc.city,
+        "latitude": getLoc.latitude,
+        "longitude": getLoc.longitude,
+        "severityInPercentage": confidence * 100,
+        "severity": "Moderate",
+        "image_url": "",
+        "video_name": source,
+        "frame": frame_base64
+    }
+
+
+def mail_payload(getLoc, confidence):
+    return {"latitude": getLoc.latitude, "longitude": getLoc.longitude, "severity": str(confidence * 100), "location": getLoc.address}
+
+
+def draw_overlays(img, detections, tracks):
+    for x1, y1, x2, y2, conf in detections:
+        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+        cvzone.cornerRect(img, (x1, y1, x2 - x1, y2 - y1))
+        cvzone.putTextRect(img, f'Accident {conf}', (max(0, x1), max(35, y1)), colorR=(0, 165, 255))
+
+    for x1, y1, x2, y2, id in tracks:
+        w, h = x2 - x1, y2 - y1
+        cvzone.cornerRect(img, (x1, y1, w, h), colorR=(255, 0, 255))
+        cvzone.putTextRect(img, f'{id}', (max(0, x1), max(35, y1)))
+        cv2.circle(img, (x1 + w // 2, y1 + h // 2), 5, (255, 0, 255), cv2.FILLED)
+    return img
+
+
+async def capture_stage(pipe, cap, frames):
+    try:
+        while not pipe.stopping.is_set():
+            success, img = await pipe.run_blocking("capture", cap.read)
+            if not success:
+                break
+            await frames.put(img)
+    finally:
+        await frames.put(None)
+
+
+async def infer_stage(pipe, model, frames, detected):
     try:
-        loop.run_until_complete(main())
+        while (img := await frames.get()) is not None:
+            detections = await pipe.run_blocking("infer", detect, model, img)
+            await detected.put((img, detections))
     finally:
-        loop.close()
\ No newline at end of file
+        await detected.put(None)
+
+
+def track_boxes(trackerResults):
+    return [tuple(int(v) for v in result) for result in trackerResults]
+
+
+def dispatch_alerts(events, getLoc, source, accidents_out, mails_out, **extra):
+    """Queue one accident + one mail per alerted track, using its peak-confidence frame."""
+    for event in events:
+        if getLoc is None:
+            print(f"⚠️ Track {event.track_id} on {source}: no camera location, alert not sent")
+        elif event.peak_frame is not None:
+            x1, y1, x2, y2 = (int(v) for v in event.peak_box)
+            # The stored frame is annotated even when running headless
+            event_img = draw_overlays(event.peak_frame, [], [(x1, y1, x2, y2, event.track_id)])
+            _, frame_encoded = cv2.imencode('.jpg', event_img)
+            frame_base64 = base64.b64encode(frame_encoded).decode('utf-8')
+
+            mails_out.put(mail_payload(getLoc, event.peak_confidence))
+            accidents_out.put(dict(accident_payload(getLoc, event.peak_confidence, source, frame_base64), **extra))
+        event.peak_frame = None
+
+
+async def track_stage(pipe, detected, display, sink, getLoc, source, accidents_out, mails_out):
+    # Runs on the event loop: SORT is cheap and the outboxes live here
+    tracker = VectorSort(max_age=20, min_hits=3, iou_threshold=0.3)
+    events = EventManager()
+
+    try:
+        while (item := await detected.get()) is not None:
+            img, detections = item
+            with pipe.timed("track"):
+                trackerResults = tracker.update(detections)
+                alerts = events.update(trackerResults, detections, img)
+                dispatch_alerts(alerts, getLoc, source, accidents_out, mails_out)
+
+            # Checked per frame: an MJPEG preview only wants frames while someone watches
+            if display is not None and sink.wants_frames:
+                await display.put((img, detections, track_boxes(trackerResults)))
+    finally:
+        if display is not None:
+            await display.put(None)
+        print("events:", events.stats())
+
+
+def render(sink, img, detections, tracks):
+    """Display stage (executor thread): overlays are only drawn here."""
+    if not sink.wants_frames:
+        # The last viewer left while this frame was queued
+        return False
+    return sink.write(draw_overlays(img, detections, tracks))
+
+
+async def display_stage(pipe, sink, display):
+    while (item := await display.get()) is not None:
+        # After a stop request, keep draining so upstream stages can reach end-of-stream
+        if not pipe.stopping.is_set() and await pipe.run_blocking("display", render, sink, *item):
+            pipe.stop()
+
+
+async def main(args):
+    model = YOLO(args.model)
+    cap = open_source(args.source)
+    sink = make_sink(args.sink, output=args.output, fps=cap.get(cv2.CAP_PROP_FPS), port=args.mjpeg_port)
+
+    # Network calls go through outboxes so a slow server never stalls detection.
+    # Accidents are logged to disk first and replayed when the server is back.
+    accidents_out = DurableOutbox("instance/accident_outbox.sqlite", post_accident_batch, max_batch=50).start()
+    mails_out = mail_outbox().start()
+
+    loop = asyncio.get_running_loop()
+    getLoc = await loop.run_in_executor(None, locate, args.lat, args.lon)
+    print(getLoc)
+
+    # capture -> frames -> infer -> detected -> track [-> display -> sink]
+    pipe = Pipeline(queue_size=QUEUE_SIZE)
+    frames = pipe.queue("frames")
+    detected = pipe.queue("detected")
+    display = pipe.queue("display") if not isinstance(sink, NullSink) else None
+
+    pipe.spawn("capture", capture_stage(pipe, cap, frames))
+    pipe.spawn("infer", infer_stage(pipe, model, frames, detected))
+    pipe.spawn("track", track_stage(pipe, detected, display, sink, getLoc, args.source, accidents_out, mails_out))
+    if display is not None:
+        pipe.spawn("display", display_stage(pipe, sink, display))
+    reporter = asyncio.create_task(pipe.report_every(REPORT_EVERY_S))
+
+    try:
+        await pipe.join()
+    finally:
+        pipe.stop()
+        await reporter
+        # Dispatch tasks: flush what was queued before exiting
+        await accidents_out.close()
+        await mails_out.close()
+        await api.aclose()
+        cap.release()
+        sink.close()
+        print("pipeline:", pipe.stats(), "sink:", sink.stats())
+        print("accidents:", accidents_out.stats(), "mail:", mails_out.stats(), "http:", api.stats())
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,69 @@
+"""Cold-start import cost of the tracker modules, measured with python -X importtime.
+
+Each target is imported in a fresh interpreter several times and the median
+total (sum of every module's self time) is reported, plus the heaviest
+top-level imports. "sort.py before split" replays the import list
+modules/sort.py had when it carried the MOT demo (forced TkAgg matplotlib,
+skimage, filterpy at import).
+
+Run from the model-implementor directory:
+
+    python -m benchmarks.bench_import_time
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+TARGETS = {
+    "sort.py before split": (
+        "import matplotlib; matplotlib.use('TkAgg'); "
+        "import matplotlib.pyplot, matplotlib.patches, skimage.io, filterpy.kalman, glob, argparse; "
+        "import modules.geometry"
+    ),
+    "modules.sort": "import modules.sort",
+    "modules.tracker": "import modules.tracker",
+    "edge app": "import app",
+}
+
+
+def import_profile(code):
+    """(total seconds, {top-level module: cumulative seconds}) or None if the import fails."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+
+    total = 0
+    top = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total += int(self_us)
+        # Nested imports are indented under the module that triggered them
+        if not name[1:].startswith(" "):
+            top[name.strip()] = int(cumulative_us) / 1e6
+    return total / 1e6, top
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'target':<22} {'median ms':>10}  heaviest top-level imports")
+    for name, code in TARGETS.items():
+        runs = [import_profile(code) for _ in range(args.runs)]
+        if any(r is None for r in runs):
+            print(f"{name:<22} {'n/a':>10}  (import failed here, missing dependency?)")
+            continue
+
+        median = statistics.median(total for total, _ in runs)
+        heaviest = sorted(runs[-1][1].items(), key=lambda kv: -kv[1])[:args.top]
+        listed = ", ".join(f"{mod} {sec * 1e3:.0f}" for mod, sec in heaviest)
+        print(f"{name:<22} {median * 1e3:>10.1f}  {listed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""SORT tracking throughput: modules.sort.Sort vs modules.tracker.VectorSort.
+
+Synthetic sequences are written and read back in MOT det.txt format
+(frame, -1, x, y, w, h, score, ...), the same input sort.py's demo uses.
+Pass --seq_path to run on real MOT detections instead. Both trackers get the
+same detections and their outputs are compared frame by frame.
+
+Run from the model-implementor directory:
+
+    python -m benchmarks.bench_tracker
+    python -m benchmarks.bench_tracker --seq_path data --phase train
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from modules.tracker import VectorSort, linear_assignment
+
+
+def synthetic_mot(n_objects, n_frames, rng, extent=4000, miss_rate=0.05):
+    """MOT rows for n_objects boxes moving at constant speed, with jitter and misses."""
+    pos = rng.uniform(0, extent, (n_objects, 2))
+    vel = rng.uniform(-4, 4, (n_objects, 2))
+    size = rng.uniform(20, 80, (n_objects, 2))
+
+    rows = []
+    for frame in range(1, n_frames + 1):
+        pos += vel
+        seen = rng.random(n_objects) > miss_rate
+        xy = pos[seen] + rng.normal(0, 1.0, (seen.sum(), 2))
+        score = rng.uniform(0.5, 1.0, seen.sum())
+        for (x, y), (w, h), s in zip(xy, size[seen], score):
+            rows.append((frame, -1, x, y, w, h, s, -1, -1, -1))
+    return np.array(rows)
+
+
+def load_frames(det_file):
+    seq_dets = np.loadtxt(det_file, delimiter=',')
+    frames = []
+    for frame in range(1, int(seq_dets[:, 0].max()) + 1):
+        dets = seq_dets[seq_dets[:, 0] == frame, 2:7]
+        dets[:, 2:4] += dets[:, 0:2]  # [x1, y1, w, h] -> [x1, y1, x2, y2]
+        frames.append(dets)
+    return frames
+
+
+def run(tracker, frames):
+    outputs = []
+    start = time.perf_counter()
+    for dets in frames:
+        outputs.append(tracker.update(dets))
+    return time.perf_counter() - start, outputs
+
+
+def compare(expected, actual):
+    """Max coordinate difference, or None if ids/row counts ever differ."""
+    worst = 0.0
+    for e, a in zip(expected, actual):
+        if e.shape != a.shape or not np.array_equal(e[:, 4], a[:, 4]):
+            return None
+        if len(e):
+            worst = max(worst, float(np.abs(e[:, :4] - a[:, :4]).max()))
+    return worst
+
+
+def reference_sort():
+    try:
+        from modules.sort import KalmanBoxTracker, Sort
+    except ImportError as e:
+        print(f"(modules.sort unavailable, skipping reference: {e})")
+        return None
+    return Sort, KalmanBoxTracker
+
+
+def bench(name, frames, reference, args):
+    params = dict(max_age=args.max_age, min_hits=args.min_hits, iou_threshold=args.iou_threshold)
+
+    VectorSort.count = 0
+    vec_time, vec_out = run(VectorSort(**params), frames)
+    vec_fps = len(frames) / vec_time
+
+    ref_fps, diff = float("nan"), "-"
+    if reference is not None:
+        Sort, KalmanBoxTracker = reference
+        KalmanBoxTracker.count = 0
+        ref_time, ref_out = run(Sort(**params), frames)
+        ref_fps = len(frames) / ref_time
+        worst = compare(ref_out, vec_out)
+        diff = "ids differ" if worst is None else f"{worst:.1e}"
+
+    dets = sum(len(d) for d in frames) / len(frames)
+    print(f"{name:>12} {dets:>8.0f} {ref_fps:>10.1f} {vec_fps:>10.1f} {vec_fps / ref_fps:>8.1f}x {diff:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SORT tracker benchmark")
+    parser.add_argument("--sizes", default="10,100,1000", help="objects per synthetic sequence")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--seq_path", default=None, help="MOT root with <phase>/*/det/det.txt")
+    parser.add_argument("--phase", default="train")
+    parser.add_argument("--max_age", type=int, default=1)
+    parser.add_argument("--min_hits", type=int, default=3)
+    parser.add_argument("--iou_threshold", type=float, default=0.3)
+    args = parser.parse_args()
+
+    reference = reference_sort()
+    linear_assignment(np.zeros((2, 2)))  # pay the lap/scipy import before timing
+    print(f"{'sequence':>12} {'dets/frm':>8} {'sort fps':>10} {'vec fps':>10} {'speedup':>9} {'max |diff|':>11}")
+
+    if args.seq_path:
+        for det_file in sorted(glob.glob(os.path.join(args.seq_path, args.phase, '*', 'det', 'det.txt'))):
+            seq = det_file.split(os.sep)[-3]
+            bench(seq, load_frames(det_file), reference, args)
+        return
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(s) for s in args.sizes.split(",")]:
+            det_file = os.path.join(tmp, f"synthetic-{n}.txt")
+            np.savetxt(det_file, synthetic_mot(n, args.frames, rng), delimiter=',', fmt='%.2f')
+            bench(f"{n} tracks", load_frames(det_file), reference, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from modules.geometry import iou_batch
+
+# -----------------------------
+# TRACK EVENT STATES
+# -----------------------------
+# candidate -> confirmed -> alerted -> expired
+#
+# candidate: tracked, not enough evidence yet
+# confirmed: min_hits sightings within the last window_frames frames with
+#            mean confidence >= min_confidence
+# alerted:   the alert went out (or was suppressed because an overlapping
+#            track already alerted); the track never fires again
+# expired:   unseen for expire_s, dropped from the index
+CANDIDATE = "candidate"
+CONFIRMED = "confirmed"
+ALERTED = "alerted"
+EXPIRED = "expired"
+
+
+class TrackEvent:
+    def __init__(self, track_id, now):
+        self.track_id = track_id
+        self.state = CANDIDATE
+        self.first_seen = now
+        self.last_seen = now
+        self.hits = deque()           # (frame, confidence) inside the window
+        self.box = None
+        self.peak_confidence = -1.0
+        self.peak_box = None
+        self.peak_frame = None        # copy of the frame with the best confidence
+        self.suppressed = False
+
+    def mean_confidence(self):
+        return sum(c for _, c in self.hits) / len(self.hits) if self.hits else 0.0
+
+
+class EventManager:
+    """Turns Sort.update output into at most one accident event per track.
+
+    Tracks are indexed by id in an OrderedDict kept in last-seen order, so
+    lookups are O(1) and expiry only pops from the front. Alerted boxes are
+    remembered for suppress_s seconds; a newly confirmed track overlapping one
+    of them (IOU > suppress_iou) is marked alerted without firing.
+
+    The confirmation window counts frames handed to update(), not seconds,
+    so a slow camera or a busy CPU needs the same evidence as a fast one
+    instead of never collecting min_hits sightings in time.
+    """
+
+    def __init__(self, min_hits=5, window_frames=10, min_confidence=0.5, expire_s=10.0,
+                 suppress_iou=0.3, suppress_s=60.0):
+        self.min_hits = min_hits
+        self.window_frames = window_frames
+        self.min_confidence = min_confidence
+        self.expire_s = expire_s
+        self.suppress_iou = suppress_iou
+        self.suppress_s = suppress_s
+
+        self.frame_count = 0
+        self.tracks = OrderedDict()
+        self.recent_alerts = deque()  # (time, box)
+        self.metrics = {"tracks": 0, "confirmed": 0, "alerted": 0, "suppressed": 0, "expired": 0}
+
+    def _track_confidences(self, tracks, detections):
+        """Confidence of the detection each track box was matched to this frame."""
+        if len(detections) == 0:
+            return np.zeros(len(tracks))
+        iou = iou_batch(tracks, detections)
+        best = iou.argmax(axis=1)
+        return np.where(iou[np.arange(len(tracks)), best] > 0, detections[best, 4], 0.0)
+
+    def _expire(self, now):
+        while self.tracks:
+            track_id, event = next(iter(self.tracks.items()))
+            if now - event.last_seen < self.expire_s:
+                break
+            event.state = EXPIRED
+            event.peak_frame = None
+            del self.tracks[track_id]
+            self.metrics["expired"] += 1
+
+        while self.recent_alerts and now - self.recent_alerts[0][0] >= self.suppress_s:
+            self.recent_alerts.popleft()
+
+    def _overlaps_recent_alert(self, box):
+        if not self.recent_alerts:
+            return False
+        boxes = np.array([b for _, b in self.recent_alerts])
+        return bool((iou_batch(np.array([box]), boxes) > self.suppress_iou).any())
+
+    def update(self, tracks, detections, img, now=None):
+        """
+        tracks: Sort.update output [x1, y1, x2, y2, id]; detections: [x1, y1, x2, y2, conf].
+        Returns the TrackEvents that should raise an alert now.
+        """
+        now = time.monotonic() if now is None else now
+        tracks = np.asarray(tracks).reshape(-1, 5)
+        detections = np.asarray(detections).reshape(-1, 5)
+        self.frame_count += 1
+        frame = self.frame_count
+
+        alerts = []
+        for row, confidence in zip(tracks, self._track_confidences(tracks, detections)):
+            track_id = int(row[4])
+            box = row[:4].copy()
+
+            event = self.tracks.get(track_id)
+            if event is None:
+                event = self.tracks[track_id] = TrackEvent(track_id, now)
+                self.metrics["tracks"] += 1
+            else:
+                self.tracks.move_to_end(track_id)
+
+            event.last_seen = now
+            event.box = box
+            if event.state == ALERTED:
+                continue
+
+            event.hits.append((frame, float(confidence)))
+            while frame - event.hits[0][0] >= self.window_frames:
+                event.hits.popleft()
+
+            if confidence > event.peak_confidence:
+                event.peak_confidence = float(confidence)
+                event.peak_box = box
+                event.peak_frame = img.copy() if img is not None else None
+
+            if len(event.hits) >= self.min_hits and event.mean_confidence() >= self.min_confidence:
+                event.state = CONFIRMED
+                self.metrics["confirmed"] += 1
+
+                event.suppressed = self._overlaps_recent_alert(box)
+                event.state = ALERTED
+                if event.suppressed:
+                    self.metrics["suppressed"] += 1
+                    event.peak_frame = None
+                else:
+                    self.metrics["alerted"] += 1
+                    self.recent_alerts.append((now, box))
+                    alerts.append(event)
+
+        self._expire(now)
+        return alerts
+
+    def stats(self):
+        states = {CANDIDATE: 0, CONFIRMED: 0, ALERTED: 0}
+        for event in self.tracks.values():
+            states[event.state] += 1
+        return dict(self.metrics, active=len(self.tracks), states=states)
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# -----------------------------
+# STAGED PIPELINE
+# -----------------------------
+# Stages are asyncio tasks connected by bounded asyncio.Queues. Blocking work
+# (cv2 capture, YOLO, HighGUI) goes through run_blocking(), which uses one
+# executor thread per stage, so the event loop stays free for tracking and
+# network dispatch. A full queue makes the upstream stage wait (backpressure).
+# None is the end-of-stream marker passed down the queues.
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record(self, seconds):
+        self.items += 1
+        self.latency_total += seconds
+        self.latency_max = max(self.latency_max, seconds)
+
+    def snapshot(self):
+        return {
+            "items": self.items,
+            "latency_avg_ms": round(1000 * self.latency_total / self.items, 2) if self.items else 0.0,
+            "latency_max_ms": round(1000 * self.latency_max, 2),
+        }
+
+
+class Pipeline:
+    def __init__(self, queue_size=4):
+        self.queue_size = queue_size
+        self.queues = {}
+        self.stages = {}
+        self.tasks = []
+        self.stopping = asyncio.Event()
+        self.started_at = time.perf_counter()
+        self._executors = {}
+
+    def queue(self, name, maxsize=None):
+        self.queues[name] = asyncio.Queue(maxsize=maxsize or self.queue_size)
+        return self.queues[name]
+
+    def stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = StageStats(name)
+        return self.stages[name]
+
+    async def run_blocking(self, stage, fn, *args):
+        """Run fn(*args) on the stage's own thread and time it."""
+        if stage not in self._executors:
+            self._executors[stage] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"stage-{stage}")
+        start = time.perf_counter()
+        result = await asyncio.get_running_loop().run_in_executor(self._executors[stage], fn, *args)
+        self.stage(stage).record(time.perf_counter() - start)
+        return result
+
+    def timed(self, stage):
+        """Context manager timing inline (event-loop) work for a stage."""
+        return _Timed(self.stage(stage))
+
+    def spawn(self, name, coro):
+        task = asyncio.create_task(self._guard(name, coro), name=name)
+        self.tasks.append(task)
+        return task
+
+    async def _guard(self, name, coro):
+        try:
+            return await coro
+        except Exception:
+            # One broken stage stops the others instead of leaving them blocked
+            self.stop()
+            print(f"❌ stage {name} failed")
+            raise
+
+    def stop(self):
+        self.stopping.set()
+
+    async def join(self):
+        try:
+            return await asyncio.gather(*self.tasks)
+        finally:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "stages": {name: s.snapshot() for name, s in self.stages.items()},
+            "queues": {name: {"depth": q.qsize(), "max": q.maxsize} for name, q in self.queues.items()},
+        }
+
+    async def report_every(self, seconds):
+        while not self.stopping.is_set():
+            try:
+                await asyncio.wait_for(self.stopping.wait(), seconds)
+            except asyncio.TimeoutError:
+                print("[pipeline]", self.stats())
+
+
+class _Timed:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(time.perf_counter() - self.start)
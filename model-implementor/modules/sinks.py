@@ -0,0 +1,166 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+# -----------------------------
+# FRAME SINKS
+# -----------------------------
+# Where annotated frames go. The pipeline checks sink.wants_frames for every
+# frame and only draws overlays and calls write() while it is True, so
+# headless runs and an unwatched preview skip rendering entirely. write() runs on the display stage's thread and returns True
+# when the sink asks the pipeline to stop (q in the window).
+
+
+class FrameSink:
+    @property
+    def wants_frames(self):
+        return True
+
+    def write(self, img):
+        return False
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class NullSink(FrameSink):
+    """Headless: frames are dropped before any overlay is drawn."""
+
+    @property
+    def wants_frames(self):
+        return False
+
+
+class WindowSink(FrameSink):
+    def __init__(self, title="Video Capture"):
+        self.title = title
+
+    def write(self, img):
+        cv2.imshow(self.title, img)
+        return cv2.waitKey(1) & 0xFF == ord('q')
+
+    def close(self):
+        cv2.destroyAllWindows()
+
+
+class VideoFileSink(FrameSink):
+    """Annotated MP4; the writer opens on the first frame to learn its size."""
+
+    def __init__(self, path, fps=30.0):
+        self.path = path
+        self.fps = fps or 30.0
+        self.writer = None
+        self.frames = 0
+
+    def write(self, img):
+        if self.writer is None:
+            h, w = img.shape[:2]
+            self.writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (w, h))
+        self.writer.write(img)
+        self.frames += 1
+        return False
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+
+    def stats(self):
+        return {"path": self.path, "frames": self.frames}
+
+
+class MjpegSink(FrameSink):
+    """multipart/x-mixed-replace preview on http://host:port/.
+
+    Frames are JPEG-encoded only while at least one viewer is connected;
+    slow viewers skip frames instead of holding the pipeline back.
+    """
+
+    def __init__(self, host="0.0.0.0", port=8090, quality=80):
+        self.quality = quality
+        self.viewers = 0
+        self.frames_encoded = 0
+        self._jpeg = None
+        self._seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.end_headers()
+                sink._stream(self.wfile)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mjpeg-sink", daemon=True)
+        self._thread.start()
+        print(f"📺 MJPEG preview on http://{host}:{port}/")
+
+    @property
+    def wants_frames(self):
+        # Nobody watching: nothing to draw or encode
+        return self.viewers > 0
+
+    def _stream(self, wfile):
+        seen = 0
+        with self._cond:
+            self.viewers += 1
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq != seen or self._closed)
+                    if self._closed:
+                        return
+                    seen, jpeg = self._seq, self._jpeg
+                wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._cond:
+                self.viewers -= 1
+
+    def write(self, img):
+        if self.viewers:
+            ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if ok:
+                with self._cond:
+                    self._jpeg = buf.tobytes()
+                    self._seq += 1
+                    self.frames_encoded += 1
+                    self._cond.notify_all()
+        return False
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        return {"viewers": self.viewers, "frames_encoded": self.frames_encoded}
+
+
+SINKS = ("none", "window", "mjpeg", "file")
+
+
+def make_sink(kind, output=None, fps=30.0, port=8090):
+    if kind == "none":
+        return NullSink()
+    if kind == "window":
+        return WindowSink()
+    if kind == "mjpeg":
+        return MjpegSink(port=port)
+    if kind == "file":
+        return VideoFileSink(output or "annotated.mp4", fps)
+    raise ValueError(f"Unknown sink {kind!r}, expected one of {', '.join(SINKS)}")
@@ -0,0 +1,206 @@
+"""
+Array-backed SORT tracker.
+
+Same model and the same output as modules.sort.Sort (constant-velocity
+Kalman filter on [x, y, s, r], greedy/Hungarian IOU association), but every
+track lives in preallocated structure-of-arrays buffers instead of one
+KalmanBoxTracker + filterpy KalmanFilter per object:
+
+    x      (capacity, 7)     state [x, y, s, r, vx, vy, vs]
+    P      (capacity, 7, 7)  state covariance
+    ids, hits, hit_streak, age, time_since_update   (capacity,)
+
+Tracks occupy rows [0, n) in creation order, so predict and update are one
+batched matmul over all (or all matched) tracks, and deleting tracks is an
+order-preserving compaction. Buffers double when full.
+"""
+import numpy as np
+
+from modules.geometry import iou_batch
+from modules.sort import linear_assignment
+
+DIM_X, DIM_Z = 7, 4
+
+F = np.eye(DIM_X)
+F[0, 4] = F[1, 5] = F[2, 6] = 1.
+
+# Measurement noise, process noise and initial covariance as in KalmanBoxTracker
+R = np.eye(DIM_Z)
+R[2:, 2:] *= 10.
+
+Q = np.eye(DIM_X)
+Q[-1, -1] *= 0.01
+Q[4:, 4:] *= 0.01
+
+P0 = np.eye(DIM_X)
+P0[4:, 4:] *= 1000.  # high uncertainty for the unobserved initial velocities
+P0 *= 10.
+
+
+def bbox_to_z(bboxes):
+    """(n, >=4) [x1, y1, x2, y2] -> (n, 4) [cx, cy, area, aspect]."""
+    w = bboxes[:, 2] - bboxes[:, 0]
+    h = bboxes[:, 3] - bboxes[:, 1]
+    return np.column_stack((bboxes[:, 0] + w / 2., bboxes[:, 1] + h / 2., w * h, w / h))
+
+
+def x_to_bbox(x):
+    """(n, >=4) [cx, cy, area, aspect, ...] -> (n, 4) [x1, y1, x2, y2]."""
+    with np.errstate(invalid="ignore"):
+        w = np.sqrt(x[:, 2] * x[:, 3])
+        h = x[:, 2] / w
+    return np.column_stack((x[:, 0] - w / 2., x[:, 1] - h / 2., x[:, 0] + w / 2., x[:, 1] + h / 2.))
+
+
+def associate(detections, trackers, iou_threshold=0.3):
+    """
+    Same result (and ordering) as sort.associate_detections_to_trackers, with
+    the unmatched sets computed from boolean masks instead of membership scans.
+    """
+    n_det, n_trk = len(detections), len(trackers)
+    if n_trk == 0:
+        return np.empty((0, 2), dtype=int), np.arange(n_det), np.empty((0,), dtype=int)
+
+    iou_matrix = iou_batch(detections, trackers)
+
+    if min(iou_matrix.shape) > 0:
+        a = iou_matrix > iou_threshold
+        if a.sum(1).max() == 1 and a.sum(0).max() == 1:
+            matched = np.stack(np.where(a), axis=1)
+        else:
+            matched = linear_assignment(-iou_matrix)
+    else:
+        matched = np.empty((0, 2), dtype=int)
+    matched = matched.reshape(-1, 2).astype(int)
+
+    det_matched = np.zeros(n_det, dtype=bool)
+    trk_matched = np.zeros(n_trk, dtype=bool)
+    det_matched[matched[:, 0]] = True
+    trk_matched[matched[:, 1]] = True
+
+    # Assignments below the threshold are undone and go to the back of the lists
+    low = iou_matrix[matched[:, 0], matched[:, 1]] < iou_threshold
+    unmatched_dets = np.concatenate((np.flatnonzero(~det_matched), matched[low, 0]))
+    unmatched_trks = np.concatenate((np.flatnonzero(~trk_matched), matched[low, 1]))
+    return matched[~low], unmatched_dets, unmatched_trks
+
+
+class VectorSort:
+    # Shared like KalmanBoxTracker.count, so ids are unique per process
+    count = 0
+
+    def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3, capacity=64):
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.iou_threshold = iou_threshold
+        self.frame_count = 0
+        self.n = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = getattr(self, "x", None)
+        x = np.zeros((capacity, DIM_X))
+        P = np.zeros((capacity, DIM_X, DIM_X))
+        counters = {name: np.zeros(capacity, dtype=np.int64)
+                    for name in ("ids", "hits", "hit_streak", "age", "time_since_update")}
+
+        if old is not None:
+            n = self.n
+            x[:n], P[:n] = self.x[:n], self.P[:n]
+            for name in counters:
+                counters[name][:n] = getattr(self, name)[:n]
+
+        self.capacity = capacity
+        self.x, self.P = x, P
+        for name, arr in counters.items():
+            setattr(self, name, arr)
+
+    def _keep(self, keep):
+        """Drop rows where keep is False, preserving creation order."""
+        k = int(keep.sum())
+        if k == self.n:
+            return
+        for arr in (self.x, self.P, self.ids, self.hits, self.hit_streak, self.age, self.time_since_update):
+            arr[:k] = arr[:self.n][keep]
+        self.n = k
+
+    def _predict(self):
+        n = self.n
+        x, P = self.x[:n], self.P[:n]
+
+        # Keep the predicted area from going negative
+        x[x[:, 6] + x[:, 2] <= 0, 6] = 0.
+        x[:] = x @ F.T
+        P[:] = F @ P @ F.T + Q
+
+        self.age[:n] += 1
+        self.hit_streak[:n][self.time_since_update[:n] > 0] = 0
+        self.time_since_update[:n] += 1
+        return x_to_bbox(x)
+
+    def _update(self, rows, bboxes):
+        """Batched Kalman update (Joseph form, as filterpy) of the given rows."""
+        x, P = self.x[rows], self.P[rows]
+
+        y = bbox_to_z(bboxes) - x[:, :DIM_Z]
+        PHT = P[:, :, :DIM_Z]
+        S = PHT[:, :DIM_Z, :] + R
+        K = PHT @ np.linalg.inv(S)
+
+        x += (K @ y[:, :, None])[:, :, 0]
+        I_KH = np.broadcast_to(np.eye(DIM_X), P.shape).copy()
+        I_KH[:, :, :DIM_Z] -= K
+        P = I_KH @ P @ I_KH.transpose(0, 2, 1) + K @ R @ K.transpose(0, 2, 1)
+
+        self.x[rows], self.P[rows] = x, P
+        self.time_since_update[rows] = 0
+        self.hits[rows] += 1
+        self.hit_streak[rows] += 1
+
+    def _create(self, bboxes):
+        k = len(bboxes)
+        if self.n + k > self.capacity:
+            self._allocate(max(2 * self.capacity, self.n + k))
+
+        new = slice(self.n, self.n + k)
+        self.x[new] = 0.
+        self.x[new, :DIM_Z] = bbox_to_z(bboxes)
+        self.P[new] = P0
+        self.ids[new] = np.arange(VectorSort.count, VectorSort.count + k)
+        self.hits[new] = self.hit_streak[new] = self.age[new] = self.time_since_update[new] = 0
+
+        VectorSort.count += k
+        self.n += k
+
+    def update(self, dets=np.empty((0, 5))):
+        """
+        dets: (N, 5) [x1, y1, x2, y2, score]; call once per frame, even with no detections.
+        Returns (M, 5) [x1, y1, x2, y2, id] exactly like Sort.update.
+        """
+        self.frame_count += 1
+        dets = np.asarray(dets, dtype=np.float64).reshape(-1, 5)
+
+        predicted = self._predict()
+        valid = ~np.isnan(predicted).any(axis=1)
+        if not valid.all():
+            self._keep(valid)
+            predicted = predicted[valid]
+
+        matched, unmatched_dets, _ = associate(dets, predicted, self.iou_threshold)
+        if len(matched):
+            self._update(matched[:, 1], dets[matched[:, 0]])
+        if len(unmatched_dets):
+            self._create(dets[unmatched_dets])
+
+        n = self.n
+        show = (self.time_since_update[:n] < 1) & (
+            (self.hit_streak[:n] >= self.min_hits) | (self.frame_count <= self.min_hits)
+        )
+        # Newest first, +1 as the MOT format requires positive ids
+        out = np.column_stack((x_to_bbox(self.x[:n][show]), self.ids[:n][show] + 1))[::-1]
+
+        self._keep(self.time_since_update[:n] <= self.max_age)
+        return out if len(out) else np.empty((0, 5))
+
+    def __len__(self):
+        return self.n
@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+from ultralytics import YOLO
+
+from app import DEFAULT_MODEL, dispatch_alerts, open_source, parse_detections
+from modules.events import EventManager
+from modules.geocode import locate
+from modules.tracker import VectorSort
+from services.apis import api, mail_outbox, post_accident_batch
+from services.outbox import DurableOutbox
+
+# -----------------------------
+# MULTI-CAMERA SUPERVISOR
+# -----------------------------
+# One capture thread per camera, one shared model. Capture threads keep only
+# the newest few frames per camera (live feeds drop, they don't lag); the
+# scheduler builds batches by taking at most one frame per camera per round,
+# starting from a rotating camera, so a busy feed can't starve the others.
+# Tracking and dedup state is per camera and runs on the event loop.
+
+CAMERA_DEFAULTS = {
+    "lat": None,
+    "lon": None,
+    "conf_threshold": 0.4,
+    "max_age": 20,
+    "min_hits": 3,
+    "iou_threshold": 0.3,
+    "loop": False,       # restart files at EOF (simulated cameras)
+    "realtime": False,   # pace files at their own fps instead of as fast as possible
+    "buffer": 2,         # newest frames kept per camera
+    "events": {},        # EventManager overrides: min_hits, window_frames, min_confidence, ...
+}
+RECONNECT_DELAY_S = 2.0
+REPORT_EVERY_S = 5
+
+
+def load_config(path):
+    with open(path) as f:
+        config = json.load(f)
+
+    cameras = []
+    for i, cam in enumerate(config.get("cameras", [])):
+        if "source" not in cam:
+            raise ValueError(f"camera #{i} has no source")
+        cameras.append(dict(CAMERA_DEFAULTS, **dict({"id": f"cam-{i}"}, **cam)))
+    if not cameras:
+        raise ValueError(f"{path} defines no cameras")
+
+    return {
+        "model": config.get("model", DEFAULT_MODEL),
+        "batch_size": int(config.get("batch_size", 8)),
+        "cameras": cameras,
+    }
+
+
+def is_file_source(source):
+    source = str(source)
+    return not source.isdigit() and "://" not in source
+
+
+class Camera:
+    def __init__(self, config):
+        self.config = config
+        self.id = config["id"]
+        self.source = str(config["source"])
+        self.tracker = VectorSort(max_age=config["max_age"], min_hits=config["min_hits"], iou_threshold=config["iou_threshold"])
+        self.events = EventManager(**config["events"])
+        self.location = None
+
+        self.frames = deque(maxlen=config["buffer"])
+        self.finished = False
+        self.started_at = time.perf_counter()
+        self.stats = {"captured": 0, "dropped": 0, "inferred": 0, "events": 0, "reconnects": 0}
+
+    def snapshot(self, now):
+        elapsed = now - self.started_at
+        fps = self.stats["inferred"] / elapsed if elapsed else 0.0
+        return dict(self.stats, fps=round(fps, 2), buffered=len(self.frames), finished=self.finished,
+                    tracks=self.events.stats()["active"])
+
+
+class Supervisor:
+    def __init__(self, config, accidents_out, mails_out):
+        self.model = YOLO(config["model"])
+        self.batch_size = config["batch_size"]
+        self.cameras = [Camera(c) for c in config["cameras"]]
+        self.accidents_out = accidents_out
+        self.mails_out = mails_out
+
+        self._next = 0
+        self._stopping = False
+        self._ready = None
+        self._infer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="multicam-infer")
+        self._capture_pool = ThreadPoolExecutor(max_workers=len(self.cameras), thread_name_prefix="multicam-capture")
+
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.stats = {"batches": 0, "frames": 0, "infer_seconds": 0.0}
+
+    # -----------------------------
+    # CAPTURE (one thread per camera)
+    # -----------------------------
+    def _capture(self, cam, loop):
+        cap = open_source(cam.source)
+        try:
+            if is_file_source(cam.source) and not cap.isOpened():
+                print(f"❌ Camera {cam.id}: cannot open {cam.source}")
+                return
+
+            frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0) if cam.config["realtime"] else 0.0
+            next_frame_at = time.perf_counter()
+            rewound = False
+
+            while not self._stopping:
+                success, img = cap.read()
+                if not success:
+                    if is_file_source(cam.source) and not cam.config["loop"]:
+                        break
+                    if is_file_source(cam.source):
+                        if rewound:
+                            # Nothing readable even from the start: looping would only spin
+                            print(f"❌ Camera {cam.id}: no readable frames in {cam.source}")
+                            break
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        rewound = True
+                    else:
+                        # RTSP drop / unplugged device: reopen after a pause
+                        cap.release()
+                        time.sleep(RECONNECT_DELAY_S)
+                        cap = open_source(cam.source)
+                        cam.stats["reconnects"] += 1
+                    continue
+                rewound = False
+
+                if frame_interval:
+                    next_frame_at += frame_interval
+                    time.sleep(max(0.0, next_frame_at - time.perf_counter()))
+
+                if len(cam.frames) == cam.frames.maxlen:
+                    cam.stats["dropped"] += 1
+                cam.frames.append(img)
+                cam.stats["captured"] += 1
+                loop.call_soon_threadsafe(self._ready.set)
+        finally:
+            # Also on an error, so the scheduler never waits for a dead camera
+            self._finish(cam, cap, loop)
+
+    def _finish(self, cam, cap, loop):
+        cap.release()
+        cam.finished = True
+        # Wake the scheduler so it notices when every camera is done
+        loop.call_soon_threadsafe(self._ready.set)
+
+    # -----------------------------
+    # SCHEDULER (round-robin batches)
+    # -----------------------------
+    def _next_batch(self):
+        batch = []
+        n = len(self.cameras)
+        while len(batch) < self.batch_size:
+            took = False
+            for i in range(n):
+                cam = self.cameras[(self._next + i) % n]
+                if cam.frames and len(batch) < self.batch_size:
+                    batch.append((cam, cam.frames.popleft()))
+                    took = True
+            if not took:
+                break
+        # The camera after the first one served leads the next batch
+        self._next = (self._next + 1) % n
+        return batch
+
+    def _infer(self, images):
+        start = time.perf_counter()
+        results = self.model(images, verbose=False)
+        self.stats["infer_seconds"] += time.perf_counter() - start
+        return results
+
+    async def _schedule(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                if self._stopping or all(c.finished for c in self.cameras):
+                    return
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            results = await loop.run_in_executor(self._infer_pool, self._infer, [img for _, img in batch])
+            self.stats["batches"] += 1
+            self.stats["frames"] += len(batch)
+
+            for (cam, img), result in zip(batch, results):
+                self._track(cam, img, result)
+
+    # -----------------------------
+    # TRACKING (event loop, per camera)
+    # -----------------------------
+    def _track(self, cam, img, result):
+        cam.stats["inferred"] += 1
+        detections = parse_detections(result, cam.config["conf_threshold"])
+
+        tracks = cam.tracker.update(detections)
+        alerts = cam.events.update(tracks, detections, img)
+        dispatch_alerts(alerts, cam.location, cam.source, self.accidents_out, self.mails_out, camera_id=cam.id)
+        cam.stats["events"] += len(alerts)
+
+    # -----------------------------
+    # LIFECYCLE
+    # -----------------------------
+    async def _locate(self):
+        loop = asyncio.get_running_loop()
+        for cam in self.cameras:
+            if cam.config["lat"] is not None and cam.config["lon"] is not None:
+                cam.location = await loop.run_in_executor(None, locate, cam.config["lat"], cam.config["lon"])
+            else:
+                print(f"⚠️ Camera {cam.id} has no lat/lon, its alerts will not be sent")
+
+    def snapshot(self):
+        now = self.finished_at or time.perf_counter()
+        elapsed = now - self.started_at
+        batches = self.stats["batches"]
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "fps": round(self.stats["frames"] / elapsed, 2) if elapsed else 0.0,
+            "batches": batches,
+            "avg_batch": round(self.stats["frames"] / batches, 2) if batches else 0.0,
+            "infer_ms_per_batch": round(1000 * self.stats["infer_seconds"] / batches, 2) if batches else 0.0,
+            "cameras": {cam.id: cam.snapshot(now) for cam in self.cameras},
+        }
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(REPORT_EVERY_S)
+            print("[multicam]", self.snapshot())
+
+    async def run(self, duration=None):
+        loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        await self._locate()
+
+        self.started_at = time.perf_counter()
+        for cam in self.cameras:
+            cam.started_at = self.started_at
+        captures = [loop.run_in_executor(self._capture_pool, self._capture, cam, loop) for cam in self.cameras]
+        reporter = asyncio.create_task(self._report())
+
+        try:
+            await asyncio.wait_for(self._schedule(), duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.finished_at = time.perf_counter()
+            self._stopping = True
+            reporter.cancel()
+            await asyncio.gather(*captures)
+            self._infer_pool.shutdown(wait=False)
+            self._capture_pool.shutdown(wait=False)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-camera edge accident detector")
+    parser.add_argument("--config", default="cameras.example.json", help="JSON camera list")
+    parser.add_argument("--duration", type=float, default=None, help="stop after N seconds (looping sources never end)")
+    return parser.parse_args(argv)
+
+
+async def main(args):
+    config = load_config(args.config)
+
+    accidents_out = DurableOutbox("instance/accident_outbox.sqlite", post_accident_batch, max_batch=50).start()
+    mails_out = mail_outbox().start()
+    supervisor = Supervisor(config, accidents_out, mails_out)
+
+    try:
+        await supervisor.run(args.duration)
+    finally:
+        await accidents_out.close()
+        await mails_out.close()
+        await api.aclose()
+        print("multicam:", supervisor.snapshot())
+        print("accidents:", accidents_out.stats(), "mail:", mails_out.stats(), "http:", api.stats())
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
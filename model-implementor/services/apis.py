@@ -1,14 +1,194 @@
+import asyncio
+import random
+import time
+
 import httpx
 
-API_URL = "http://127.0.0.1:8080/api/v1/accident/create"
-SEND_MAIL_URL = "http://127.0.0.1:8080/api/v1/emails/send-email"
+API_BASE_URL = "http://127.0.0.1:8080"
+API_URL = "/api/v1/accident/create"
+BULK_API_URL = "/api/v1/accident/bulk"
+SEND_MAIL_URL = "/api/v1/emails/send-email"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Pause after an unexpected error in a send function before draining on
+ERROR_DELAY = 1.0
+
+
+class ApiClient:
+    """One long-lived httpx client (keep-alive pool) for every call to the server.
+
+    Transport errors and retryable statuses are retried with exponential
+    backoff and full jitter: sleep uniform(0, min(max_backoff, backoff * 2**n)).
+    Any other non-2xx answer raises httpx.HTTPStatusError straight away.
+    """
+
+    def __init__(self, base_url=API_BASE_URL, max_connections=10, max_keepalive=5,
+                 timeout=5.0, retries=3, backoff=0.5, max_backoff=8.0):
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=30,
+        )
+        self.timeout = httpx.Timeout(timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._client = None
+
+        self.metrics = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "rejected": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+        }
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=self.limits, timeout=self.timeout)
+        return self._client
+
+    async def post(self, path, json):
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            self.metrics["requests"] += 1
+            try:
+                response = await self.client.post(path, json=json)
+                error = None if response.status_code not in RETRY_STATUSES else f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                response, error = None, str(e) or type(e).__name__
+            finally:
+                latency = time.perf_counter() - start
+                self.metrics["latency_total"] += latency
+                self.metrics["latency_max"] = max(self.metrics["latency_max"], latency)
+
+            if error is None:
+                if not response.is_success:
+                    # 4xx and friends: retrying the same body will not help
+                    self.metrics["rejected"] += 1
+                    raise httpx.HTTPStatusError(
+                        f"POST {path} rejected: HTTP {response.status_code} {response.text[:200]}",
+                        request=response.request,
+                        response=response,
+                    )
+                return response
+            if attempt == self.retries:
+                break
+
+            self.metrics["retries"] += 1
+            await asyncio.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+        self.metrics["failures"] += 1
+        raise httpx.HTTPError(f"POST {path} failed after {self.retries + 1} attempts: {error}")
+
+    def stats(self):
+        stats = dict(self.metrics)
+        stats["latency_avg"] = stats["latency_total"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class Outbox:
+    """Bounded in-memory queue drained by a background task.
+
+    put() never blocks the detection loop: when the queue is full the oldest
+    event is dropped. The worker sends up to max_batch events at once, waiting
+    at most max_delay seconds for a batch to fill.
+    """
+
+    def __init__(self, name, send, max_size=1000, max_batch=1, max_delay=0.0):
+        self.name = name
+        self.send = send
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = asyncio.Queue(maxsize=max_size)
+        self._worker = None
+
+        self.metrics = {"enqueued": 0, "sent": 0, "batches": 0, "dropped_full": 0, "dropped_failed": 0}
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+        return self
+
+    def put(self, event):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self.metrics["dropped_full"] += 1
+        self._queue.put_nowait(event)
+        self.metrics["enqueued"] += 1
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.send(batch)
+                self.metrics["sent"] += len(batch)
+                self.metrics["batches"] += 1
+            except httpx.HTTPError as e:
+                self.metrics["dropped_failed"] += len(batch)
+                print(f"[{self.name}] dropped {len(batch)} events: {e}")
+            except Exception as e:
+                # A bad payload or a bug in send must not end the worker
+                self.metrics["dropped_failed"] += len(batch)
+                print(f"[{self.name}] dropped {len(batch)} events, {type(e).__name__}: {e}")
+                await asyncio.sleep(ERROR_DELAY)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self):
+        return dict(self.metrics, depth=self._queue.qsize())
+
+    async def close(self, timeout=10.0):
+        """Give queued events up to `timeout` seconds to go out, then stop."""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[{self.name}] {self._queue.qsize()} events not sent before shutdown")
+        if self._worker is not None:
+            self._worker.cancel()
+
+
+api = ApiClient()
+
 
 async def post_accident_data(data):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(API_URL, json=data)
-        return response
-    
+    return await api.post(API_URL, data)
+
+
+async def post_accident_batch(records):
+    return await api.post(BULK_API_URL, records)
+
+
 async def send_mail_async_final(latitude, longitude, severity, location):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(SEND_MAIL_URL, json={"latitude": latitude, "longitude": longitude, "severity": severity, "location": location})
-        return response
\ No newline at end of file
+    return await api.post(SEND_MAIL_URL, {"latitude": latitude, "longitude": longitude, "severity": severity, "location": location})
+
+
+def mail_outbox(max_size=100):
+    async def send(batch):
+        for payload in batch:
+            await api.post(SEND_MAIL_URL, payload)
+    return Outbox("mail", send, max_size)
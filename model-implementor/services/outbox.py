@@ -0,0 +1,258 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+import httpx
+
+
+def _record_results(response, count):
+    """Per-record results of a bulk response, or None if it has none."""
+    try:
+        results = response.json()["results"]
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+    if not isinstance(results, list) or len(results) != count:
+        return None
+    return [result if isinstance(result, dict) else {} for result in results]
+
+
+class DurableOutbox:
+    """Append-only SQLite outbox for events that must survive a server outage.
+
+    put() appends to the log and only commits (fsyncs) every `commit_every`
+    events or `commit_interval` seconds, so a burst costs one fsync rather
+    than one per event; the worker also commits every `commit_interval` while
+    it waits or backs off. A background task replays the log in insertion
+    order, `max_batch` events per request, and settles each event by the
+    server's per-record result: created or duplicate events are deleted,
+    invalid ones move to the dead_letter table instead of being retried
+    forever, and any other failure stays in the log for the next attempt.
+    Events in a batch rejected outright with a 4xx are found by resending it
+    one event at a time and dead-lettered as well. Every event carries an event_id
+    so the server can drop duplicates when a batch is replayed after an
+    ambiguous failure.
+    """
+
+    def __init__(self, path, send, max_batch=50, commit_every=20, commit_interval=0.5,
+                 retry_delay=1.0, max_retry_delay=30.0):
+        self.path = path
+        self.send = send
+        self.max_batch = max_batch
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " event_id TEXT NOT NULL UNIQUE,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            " seq INTEGER PRIMARY KEY,"
+            " event_id TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " failed_at REAL NOT NULL,"
+            " error TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+        self._uncommitted = 0
+        self._pending_at_close = None
+        self._dead_at_close = 0
+        self._last_commit = time.monotonic()
+        self._worker = None
+        self._wakeup = asyncio.Event()
+
+        self.metrics = {"appended": 0, "commits": 0, "sent": 0, "batches": 0, "send_failures": 0,
+                        "dead_lettered": 0}
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+        return self
+
+    def put(self, event):
+        event = dict(event)
+        event.setdefault("event_id", uuid.uuid4().hex)
+
+        self._db.execute(
+            "INSERT OR IGNORE INTO outbox (event_id, payload, created_at) VALUES (?, ?, ?)",
+            (event["event_id"], json.dumps(event), time.time()),
+        )
+        self._uncommitted += 1
+        self.metrics["appended"] += 1
+
+        if (self._uncommitted >= self.commit_every
+                or time.monotonic() - self._last_commit >= self.commit_interval):
+            self._commit()
+            self._wakeup.set()
+
+    def _commit(self):
+        if self._uncommitted:
+            self._db.commit()
+            self.metrics["commits"] += 1
+            self._uncommitted = 0
+        self._pending_at_close = None
+        self._last_commit = time.monotonic()
+
+    def _oldest(self):
+        return self._db.execute(
+            "SELECT seq, payload FROM outbox ORDER BY seq LIMIT ?", (self.max_batch,)
+        ).fetchall()
+
+    async def flush_once(self):
+        """Send the oldest batch. True if something was sent."""
+        self._commit()
+        rows = self._oldest()
+        if not rows:
+            return False
+
+        try:
+            await self._send_rows(rows)
+        except httpx.HTTPStatusError as e:
+            if not e.response.is_client_error:
+                raise
+            results = _record_results(e.response, len(rows))
+            if results is not None:
+                # Nothing stored, but the server said why for every record
+                self._settle(rows, results)
+                return True
+            if len(rows) == 1:
+                # The server will never take this event as is; park it, don't block the log
+                self._dead_letter(rows[0][0], str(e))
+                return True
+            # Find the rejected events one by one so the rest still go out
+            for row in rows:
+                try:
+                    await self._send_rows([row])
+                except httpx.HTTPStatusError as e:
+                    if not e.response.is_client_error:
+                        raise
+                    self._dead_letter(row[0], str(e))
+        return True
+
+    async def _send_rows(self, rows):
+        response = await self.send([json.loads(payload) for _, payload in rows])
+        if not getattr(response, "is_success", True):
+            raise httpx.HTTPError(f"batch not accepted: HTTP {response.status_code}")
+
+        self._settle(rows, _record_results(response, len(rows)))
+
+    def _settle(self, rows, results):
+        """Drop the rows the server stored, park the invalid ones, keep the rest."""
+        if results is None:
+            # No per-record report: a 2xx means the whole batch was taken
+            results = [{"status": "created"}] * len(rows)
+
+        stored, retry = [], 0
+        for (seq, _), result in zip(rows, results):
+            status = result.get("status")
+            if status in ("created", "duplicate"):
+                stored.append((seq,))
+            elif status == "invalid":
+                self._dead_letter(seq, result.get("message", "invalid record"))
+            else:
+                # e.g. a write error on the server: the same record may go in next time
+                retry += 1
+
+        with self._db:
+            self._db.executemany("DELETE FROM outbox WHERE seq = ?", stored)
+        self.metrics["sent"] += len(stored)
+        self.metrics["batches"] += 1
+
+        if retry:
+            raise httpx.HTTPError(f"{retry} of {len(rows)} events not stored by the server")
+
+    def _dead_letter(self, seq, error):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO dead_letter (seq, event_id, payload, created_at, failed_at, error)"
+                " SELECT seq, event_id, payload, created_at, ?, ? FROM outbox WHERE seq = ?",
+                (time.time(), error, seq),
+            )
+            self._db.execute("DELETE FROM outbox WHERE seq = ?", (seq,))
+        self.metrics["dead_lettered"] += 1
+        print(f"[outbox] event {seq} rejected by the server, kept in dead_letter: {error}")
+
+    async def _backoff(self, delay):
+        # Keep committing new puts while the server is away
+        deadline = time.monotonic() + delay
+        while (remaining := deadline - time.monotonic()) > 0:
+            await asyncio.sleep(min(remaining, self.commit_interval))
+            self._commit()
+
+    async def _run(self):
+        delay = self.retry_delay
+        while True:
+            try:
+                sent = await self.flush_once()
+                delay = self.retry_delay
+            except Exception as e:
+                self.metrics["send_failures"] += 1
+                if isinstance(e, httpx.HTTPError):
+                    print(f"[outbox] batch not delivered, retrying in {delay:.1f}s: {e}")
+                else:
+                    print(f"[outbox] send failed, retrying in {delay:.1f}s, {type(e).__name__}: {e}")
+                await self._backoff(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+
+            if sent:
+                # Backlog: keep draining batch after batch
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.commit_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._commit()
+
+    def pending(self):
+        if self._pending_at_close is not None:
+            return self._pending_at_close
+        return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def dead_letters(self):
+        if self._pending_at_close is not None:
+            return self._dead_at_close
+        return self._db.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+
+    def stats(self):
+        return dict(self.metrics, pending=self.pending(), dead_letter=self.dead_letters())
+
+    async def close(self, timeout=10.0):
+        """Commit everything, try to drain for up to `timeout` seconds, then stop.
+
+        Whatever is still pending stays on disk and is replayed on next start.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline and await asyncio.wait_for(
+                self.flush_once(), max(0.0, deadline - time.monotonic())
+            ):
+                pass
+        except Exception as e:
+            print(f"[outbox] {self.pending()} events kept for replay: {e!r}")
+
+        self._commit()
+        self._dead_at_close = self.dead_letters()
+        self._pending_at_close = self.pending()
+        self._db.close()
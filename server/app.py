@@ -4,62 +4,134 @@ load_dotenv()
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from pymongo.errors import PyMongoError
 import datetime
 import os
 
-from extensions import mail  # ✅ IMPORT SHARED MAIL
+from extensions import mail, mongo  # ✅ IMPORT SHARED EXTENSIONS
+from modules.alert_dispatcher import alert_dispatcher
+from modules.analysis_cache import analysis_cache
+from modules.broadcast import broadcast_hub
+from modules.detection_sidecar import sidecar_stats
+from modules.geocode import get_geocoder
+from modules.indexes import bootstrap_indexes
+from modules.jobs import analysis_jobs
+from modules.model_registry import model_registry
+from modules.monthly_stats import backfill_monthly_stats
+from modules.storage import MAX_UPLOAD_BYTES, UploadRequest
 
 print("✅ REAL app.py RUNNING")
 
-# -------------------------
-# Flask App
-# -------------------------
-app = Flask(__name__, static_folder="static")
-app.config["UPLOAD_FOLDER"] = "static/videos"
 
-# -------------------------
-# JWT CONFIG
-# -------------------------
-app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = datetime.timedelta(days=1)
-jwt = JWTManager(app)
+def create_app(config=None):
+    # -------------------------
+    # Flask App
+    # -------------------------
+    app = Flask(__name__, static_folder="static")
+    # Uploads are spooled straight into UPLOAD_FOLDER and hashed on the way in
+    app.request_class = UploadRequest
+    app.config["UPLOAD_FOLDER"] = "static/videos"
 
-# -------------------------
-# CORS
-# -------------------------
-CORS(app, origins=["http://localhost:3000"], supports_credentials=True)
+    # Reject oversized uploads before the body is parsed; modules.storage enforces
+    # the same cap again while streaming the file to disk.
+    app.config["MAX_UPLOAD_BYTES"] = MAX_UPLOAD_BYTES
+    app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES + 1024 * 1024
 
-# -------------------------
-# MAIL CONFIG (GMAIL)
-# -------------------------
-app.config["MAIL_SERVER"] = "smtp.gmail.com"
-app.config["MAIL_PORT"] = 465
-app.config["MAIL_USERNAME"] = os.getenv("EMAIL")
-app.config["MAIL_PASSWORD"] = os.getenv("PASSWORD")
-app.config["MAIL_USE_TLS"] = False
-app.config["MAIL_USE_SSL"] = True
+    # -------------------------
+    # JWT CONFIG
+    # -------------------------
+    app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = datetime.timedelta(days=1)
+    JWTManager(app)
 
-mail.init_app(app)  # ✅ INITIALIZE MAIL HERE
+    # -------------------------
+    # CORS
+    # -------------------------
+    CORS(app, origins=["http://localhost:3000"], supports_credentials=True)
 
-# -------------------------
-# BLUEPRINTS
-# -------------------------
-from blueprints.auth import auth_bp
-from blueprints.accident.accident import accident_bp
-from blueprints.public.public import public_bp
-from blueprints.emails.emails import emails
+    # -------------------------
+    # MAIL CONFIG (GMAIL)
+    # -------------------------
+    app.config["MAIL_SERVER"] = "smtp.gmail.com"
+    app.config["MAIL_PORT"] = 465
+    app.config["MAIL_USERNAME"] = os.getenv("EMAIL")
+    app.config["MAIL_PASSWORD"] = os.getenv("PASSWORD")
+    app.config["MAIL_USE_TLS"] = False
+    app.config["MAIL_USE_SSL"] = True
 
-app.register_blueprint(auth_bp)
-app.register_blueprint(accident_bp)
-app.register_blueprint(public_bp)
-app.register_blueprint(emails)
+    # -------------------------
+    # MONGODB (ONE SHARED POOL)
+    # -------------------------
+    app.config["MONGO_URI"] = os.getenv("MONGO_URI")
+    app.config["MONGO_MAX_POOL_SIZE"] = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+    app.config["MONGO_MIN_POOL_SIZE"] = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    app.config["MONGO_TIMEOUT_MS"] = int(os.getenv("MONGO_TIMEOUT_MS", "5000"))
+    app.config["MONGO_READ_PREFERENCE"] = os.getenv("MONGO_READ_PREFERENCE", "primary")
 
-# -------------------------
-# HEALTH CHECK
-# -------------------------
-@app.route("/")
-def health():
-    return jsonify({"msg": "Server running successfully"}), 200
+    if config:
+        app.config.update(config)
+
+    mail.init_app(app)  # ✅ INITIALIZE MAIL HERE
+    alert_dispatcher.init_app(app)
+    mongo.init_app(app)
+
+    # -------------------------
+    # BLUEPRINTS
+    # -------------------------
+    from blueprints.auth import auth_bp
+    from blueprints.accident.accident import accident_bp
+    from blueprints.public.public import public_bp
+    from blueprints.emails.emails import emails
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(accident_bp)
+    app.register_blueprint(public_bp)
+    app.register_blueprint(emails)
+
+    # -------------------------
+    # MONGO INDEXES + MIGRATIONS
+    # -------------------------
+    if os.getenv("MONGO_BOOTSTRAP_INDEXES", "1") == "1":
+        try:
+            bootstrap_indexes(mongo.db)
+            backfill_monthly_stats(mongo.db)  # runs once, recorded in schema_migrations
+        except PyMongoError as e:
+            print(f"⚠️ Index bootstrap skipped: {e}")
+
+    # -------------------------
+    # MODEL WARMUP
+    # -------------------------
+    # Load YOLO once at startup so the first upload doesn't pay for it
+    if os.getenv("YOLO_WARMUP", "1") == "1":
+        model_registry.warmup()
+
+    # -------------------------
+    # HEALTH CHECK
+    # -------------------------
+    @app.route("/")
+    def health():
+        return jsonify({"msg": "Server running successfully"}), 200
+
+    # -------------------------
+    # METRICS
+    # -------------------------
+    @app.route("/metrics")
+    def metrics():
+        return jsonify({
+            "models": model_registry.stats(),
+            "analysis_jobs": analysis_jobs.stats(),
+            "analysis_cache": analysis_cache.stats(),
+            "geocoder": get_geocoder().stats(),
+            "mongo_pool": mongo.pool_stats(),
+            "alert_mail": alert_dispatcher.stats(),
+            "broadcasts": broadcast_hub.stats(),
+            "detection_sidecars": sidecar_stats.stats(),
+        }), 200
+
+    return app
+
+
+app = create_app()
 
 # -------------------------
 # RUN
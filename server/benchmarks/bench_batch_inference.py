@@ -0,0 +1,59 @@
+"""Frames/sec of analyze_video_for_accident at different batch sizes.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_batch_inference
+"""
+import argparse
+import glob
+import time
+
+import cv2
+
+from modules.detect_object_on_video import analyze_video_for_accident
+from modules.model_registry import model_registry
+
+
+def count_frames(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return min(total, max_frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched inference benchmark")
+    parser.add_argument("--videos", default="static/videos/*.mp4")
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--max-frames", type=int, default=150)
+    args = parser.parse_args()
+
+    videos = sorted(glob.glob(args.videos))
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    # Keep model loading out of the measurements
+    model_registry.warmup()
+
+    print(f"{'video':50} {'batch':>5} {'frames':>6} {'sec':>8} {'fps':>8}  result")
+    for video in videos:
+        frames = count_frames(video, args.max_frames)
+        baseline = None
+
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            analysis = analyze_video_for_accident(video, args.max_frames, batch_size=batch_size, use_sidecar=False)
+            elapsed = time.perf_counter() - start
+
+            outcome = (analysis["result"], analysis["severity"], analysis["severityInPercentage"])
+            if baseline is None:
+                baseline = outcome
+            mismatch = "" if outcome == baseline else "  (differs from batch 1!)"
+
+            print(
+                f"{video[-50:]:50} {batch_size:>5} {frames:>6} {elapsed:>8.2f} "
+                f"{frames / elapsed:>8.1f}  {outcome[0]}/{outcome[1]}{mismatch}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Pairwise collision check: nested calculate_iou loop vs modules.geometry.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_collision
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from modules import geometry
+from modules.detect_object_on_video import COLLISION_IOU, calculate_iou
+
+
+def random_boxes(n, rng, extent=1920, size=(40, 220)):
+    xy = rng.integers(0, extent, (n, 2))
+    wh = rng.integers(size[0], size[1], (n, 2))
+    return np.hstack([xy, xy + wh]).astype(int)
+
+
+def loop_pairs(boxes):
+    # The analyzer's original O(n^2) loop, without the early exit
+    pairs = []
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            if calculate_iou(boxes[i], boxes[j]) > COLLISION_IOU:
+                pairs.append((i, j))
+    return pairs
+
+
+def dense_pairs(boxes):
+    # The n x n broadcast itself; geometry.pairwise_iou would switch to the
+    # sweep from BROAD_PHASE_MIN boxes on
+    as_boxes = geometry._as_boxes(boxes)
+    return np.nonzero(np.triu(geometry._dense_iou_batch(as_boxes, as_boxes), k=1) > COLLISION_IOU)
+
+
+def sweep_pairs(boxes):
+    i, j = geometry._sweep_candidates(geometry._as_boxes(boxes))
+    keep = geometry._pair_iou(boxes[i].astype(float), boxes[j].astype(float)) > COLLISION_IOU
+    return i[keep], j[keep]
+
+
+def best_of(fn, arg, repeat):
+    timer = timeit.Timer(lambda: fn(arg))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collision scoring micro-benchmark")
+    parser.add_argument("--sizes", default="10,40,100,250,1000,4000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-dense", type=int, default=2000, help="skip the n x n matrix above this many boxes")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'boxes':>6} {'loop ms':>10} {'dense ms':>10} {'sweep ms':>10} {'pairs':>7}")
+    for n in [int(s) for s in args.sizes.split(",")]:
+        boxes = random_boxes(n, rng)
+        as_lists = boxes.tolist()
+
+        expected = len(sweep_pairs(boxes)[0])
+        run_dense = n <= args.max_dense
+        if run_dense:
+            assert expected == len(dense_pairs(boxes)[0])
+
+        loop_ms = best_of(loop_pairs, as_lists, args.repeat) * 1e3 if n <= 1000 else float("nan")
+        dense_ms = best_of(dense_pairs, boxes, args.repeat) * 1e3 if run_dense else float("nan")
+        sweep_ms = best_of(sweep_pairs, boxes, args.repeat) * 1e3
+
+        print(f"{n:>6} {loop_ms:>10.3f} {dense_ms:>10.3f} {sweep_ms:>10.3f} {expected:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Re-analysis from the detection sidecar vs running YOLO again.
+
+For each video: one analysis with the model (which writes the sidecar), one
+identical analysis read back from the sidecar, then a re-score at a few
+collision thresholds. Sidecars go to a scratch directory so the model run
+really infers.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_sidecar
+"""
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+# Write into a scratch directory so existing sidecars neither help nor get replaced
+SCRATCH = tempfile.mkdtemp(prefix="sidecar-bench-")
+os.environ["DETECTION_SIDECAR_DIR"] = SCRATCH
+
+from modules.detect_object_on_video import analyze_video_for_accident
+from modules.model_registry import model_registry
+
+
+def timed(video, max_frames, **kwargs):
+    start = time.perf_counter()
+    analysis = analyze_video_for_accident(video, max_frames, **kwargs)
+    return time.perf_counter() - start, analysis
+
+
+def outcome(analysis):
+    return analysis["result"], analysis["severity"], analysis["severityInPercentage"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection sidecar benchmark")
+    parser.add_argument("--videos", default="static/videos/*.mp4")
+    parser.add_argument("--max-frames", type=int, default=150)
+    parser.add_argument("--thresholds", default="0.05,0.15,0.3")
+    args = parser.parse_args()
+
+    videos = sorted(glob.glob(args.videos))
+    thresholds = [float(t) for t in args.thresholds.split(",")]
+
+    # Keep model loading out of the measurements
+    model_registry.warmup()
+
+    print(f"{'video':40} {'model s':>8} {'sidecar s':>9} {'speedup':>8}  rescore s per threshold")
+    try:
+        for video in videos:
+            model_s, first = timed(video, args.max_frames)
+            sidecar_s, second = timed(video, args.max_frames)
+            mismatch = "" if outcome(first) == outcome(second) else "  (differs from model run!)"
+            if not second["timings"].get("sidecar"):
+                mismatch += "  (sidecar not used)"
+
+            rescore = [timed(video, args.max_frames, collision_iou=t)[0] for t in thresholds]
+            listed = ", ".join(f"{t}: {s:.2f}" for t, s in zip(thresholds, rescore))
+            print(
+                f"{video[-40:]:40} {model_s:>8.2f} {sidecar_s:>9.2f} "
+                f"{model_s / sidecar_s:>7.1f}x  {listed}{mismatch}"
+            )
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
-from flask import Blueprint, jsonify, request
-from pymongo import MongoClient
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from datetime import datetime
-import os
-from dotenv import load_dotenv
+from werkzeug.local import LocalProxy
+import base64
+import json
 
-load_dotenv()
+from extensions import mongo
+from modules.monthly_stats import monthly_summary, record_accident, record_accidents
 
 # ---------------------------
 # BLUEPRINT
@@ -13,48 +16,66 @@ load_dotenv()
 accident_bp = Blueprint("accident", __name__, url_prefix="/api/v1/accident")
 
 # ---------------------------
-# MONGODB ATLAS
+# MONGODB ATLAS (SHARED CLIENT, RESOLVED ON USE)
 # ---------------------------
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["accident_db"]
-accident_results = db["accident_results"]
+db = LocalProxy(lambda: mongo.db)
+accident_results = LocalProxy(lambda: mongo.db["accident_results"])
 
 # ---------------------------
 # CREATE ACCIDENT
 # ---------------------------
+REQUIRED_FIELDS = [
+    "address",
+    "city",
+    "latitude",
+    "longitude",
+    "severity",
+    "severityInPercentage",
+    "image_url",
+    "video_name"
+]
+
+
+def build_accident_record(data):
+    """Validated document for one incoming record, or (None, error message)."""
+    if not isinstance(data, dict):
+        return None, "Record must be a JSON object"
+
+    for field in REQUIRED_FIELDS:
+        if field not in data:
+            return None, f"Missing field: {field}"
+
+    record = {field: data[field] for field in REQUIRED_FIELDS}
+    record["date"] = datetime.utcnow()   # always store as Date
+
+    # Edge devices tag events so replays after a lost response are ignored
+    if data.get("event_id"):
+        record["event_id"] = str(data["event_id"])
+    # Multi-camera edge boxes say which feed the event came from
+    if data.get("camera_id"):
+        record["camera_id"] = str(data["camera_id"])
+    return record, None
+
+
 @accident_bp.route("/create", methods=["POST"])
 def create_accident():
-    data = request.get_json()
+    record, error = build_accident_record(request.get_json())
 
-    required_fields = [
-        "address",
-        "city",
-        "latitude",
-        "longitude",
-        "severity",
-        "severityInPercentage",
-        "image_url",
-        "video_name"
-    ]
+    if error:
+        return jsonify({
+            "status": "error",
+            "message": error
+        }), 400
 
-    for field in required_fields:
-        if field not in data:
-            return jsonify({
-                "status": "error",
-                "message": f"Missing field: {field}"
-            }), 400
-
-    accident_results.insert_one({
-        "address": data["address"],
-        "city": data["city"],
-        "latitude": data["latitude"],
-        "longitude": data["longitude"],
-        "severity": data["severity"],
-        "severityInPercentage": data["severityInPercentage"],
-        "image_url": data["image_url"],
-        "video_name": data["video_name"],
-        "date": datetime.utcnow()   # always store as Date
-    })
+    try:
+        accident_results.insert_one(record)
+    except DuplicateKeyError:
+        return jsonify({
+            "status": "success",
+            "message": "Accident record already exists"
+        }), 200
+
+    record_accident(db, record)
 
     return jsonify({
         "status": "success",
@@ -62,86 +83,252 @@ def create_accident():
     }), 201
 
 # ---------------------------
-# GET ALL ACCIDENTS
+# BULK CREATE (EDGE DEVICES)
+# ---------------------------
+MAX_BULK_RECORDS = 1000
+DUPLICATE_KEY = 11000
+
+
+def read_bulk_records():
+    # NDJSON is read line by line off the request stream
+    if request.mimetype == "application/x-ndjson":
+        records = []
+        for line in request.stream:
+            if line.strip():
+                records.append(json.loads(line))
+            if len(records) > MAX_BULK_RECORDS:
+                break
+        return records
+
+    data = request.get_json()
+    if isinstance(data, dict):
+        data = data.get("records")
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of records")
+    return data
+
+
+@accident_bp.route("/bulk", methods=["POST"])
+def create_accidents_bulk():
+    try:
+        records = read_bulk_records()
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Invalid body: {e}"
+        }), 400
+
+    if len(records) > MAX_BULK_RECORDS:
+        return jsonify({
+            "status": "error",
+            "message": f"At most {MAX_BULK_RECORDS} records per request"
+        }), 400
+
+    # One validation pass; only valid records go to Mongo
+    results = [None] * len(records)
+    docs = []
+    positions = []
+    for index, data in enumerate(records):
+        record, error = build_accident_record(data)
+        if error:
+            # Never valid as sent, so the client should not retry it
+            results[index] = {"index": index, "status": "invalid", "message": error}
+        else:
+            docs.append(record)
+            positions.append(index)
+
+    failed = {}
+    if docs:
+        try:
+            accident_results.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed[write_error["index"]] = write_error
+
+    inserted = []
+    duplicates = 0
+    for doc_index, (index, doc) in enumerate(zip(positions, docs)):
+        write_error = failed.get(doc_index)
+        if write_error and write_error.get("code") == DUPLICATE_KEY:
+            # Same event_id already stored: a replay, not a failure
+            results[index] = {"index": index, "status": "duplicate", "event_id": doc.get("event_id")}
+            duplicates += 1
+        elif write_error:
+            results[index] = {"index": index, "status": "error", "message": write_error.get("errmsg", "Write failed")}
+        else:
+            results[index] = {"index": index, "status": "created", "id": str(doc["_id"])}
+            inserted.append(doc)
+
+    record_accidents(db, inserted)
+
+    # 200: every record stored, 207: some were not, 400: none were
+    failed = len(records) - len(inserted) - duplicates
+    if not failed:
+        status, code = "success", 200
+    elif inserted or duplicates:
+        status, code = "partial", 207
+    else:
+        status, code = "error", 400
+
+    return jsonify({
+        "status": status,
+        "inserted": len(inserted),
+        "duplicates": duplicates,
+        "failed": failed,
+        "results": results,
+    }), code
+
+# ---------------------------
+# GET ALL ACCIDENTS (KEYSET PAGINATION)
 # ---------------------------
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Only what the dashboard tables render
+LIST_PROJECTION = {
+    "video_name": 1,
+    "result": 1,
+    "severity": 1,
+    "severityInPercentage": 1,
+    "address": 1,
+    "city": 1,
+    "latitude": 1,
+    "longitude": 1,
+    "image_url": 1,
+    "date": 1,
+}
+
+
+def encode_cursor(doc):
+    date = doc.get("date")
+    payload = {
+        "d": date.isoformat() if isinstance(date, datetime) else date,
+        "t": "date" if isinstance(date, datetime) else "raw",
+        "id": str(doc["_id"]),
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    date = payload["d"]
+    if payload["t"] == "date":
+        date = datetime.fromisoformat(date)
+    return date, ObjectId(payload["id"])
+
+
+def after_cursor(date, oid):
+    # Everything that comes after (date, _id) in a (date desc, _id desc) scan
+    clauses = [
+        {"date": {"$lt": date}},
+        {"date": date, "_id": {"$lt": oid}},
+    ]
+    # $lt only compares within one BSON type; legacy string and missing
+    # dates sort below real dates
+    if isinstance(date, datetime):
+        clauses.append({"date": {"$not": {"$type": "date"}}})
+    elif date is not None:
+        clauses.append({"date": None})
+    return {"$or": clauses}
+
+
+def parse_list_query(args):
+    query = []
+
+    if args.get("city"):
+        query.append({"city": args["city"]})
+    if args.get("severity"):
+        query.append({"severity": args["severity"]})
+
+    date_range = {}
+    if args.get("date_from"):
+        date_range["$gte"] = datetime.fromisoformat(args["date_from"])
+    if args.get("date_to"):
+        date_range["$lte"] = datetime.fromisoformat(args["date_to"])
+    if date_range:
+        query.append({"date": date_range})
+
+    if args.get("cursor"):
+        query.append(after_cursor(*decode_cursor(args["cursor"])))
+
+    if not query:
+        return {}
+    return query[0] if len(query) == 1 else {"$and": query}
+
+
+def serialize_accident(doc):
+    return {
+        "id": str(doc["_id"]),
+        "video_name": doc.get("video_name"),
+        "result": doc.get("result"),
+        "severity": doc.get("severity"),
+        "severityInPercentage": doc.get("severityInPercentage"),
+        "address": doc.get("address"),
+        "city": doc.get("city"),
+        "latitude": doc.get("latitude"),
+        "longitude": doc.get("longitude"),
+        "image_url": doc.get("image_url"),
+        "date": doc.get("date"),
+    }
+
+
 @accident_bp.route("/all", methods=["GET"])
 def get_all_accidents():
-    results = []
-
-    for doc in accident_results.find().sort("date", -1):  # 🔥 newest first
-        results.append({
-            "id": str(doc["_id"]),
-            "video_name": doc.get("video_name"),
-            "result": doc.get("result"),
-            "severity": doc.get("severity"),
-            "severityInPercentage": doc.get("severityInPercentage"),
-            "address": doc.get("address"),
-            "city": doc.get("city"),
-            "latitude": doc.get("latitude"),
-            "longitude": doc.get("longitude"),
-            "image_url": doc.get("image_url"),
-            "date": doc.get("date"),
-        })
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "limit must be an integer"
+        }), 400
 
-    return jsonify({
-        "status": "success",
-        "datas": results
-    }), 200
+    try:
+        query = parse_list_query(request.args)
+    except (ValueError, KeyError, InvalidId):
+        return jsonify({
+            "status": "error",
+            "message": "Invalid filter or cursor"
+        }), 400
+
+    cursor = accident_results.find(query, LIST_PROJECTION).sort(
+        [("date", -1), ("_id", -1)]  # 🔥 newest first
+    )
+
+    # Clients follow next_cursor for the following pages
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = cursor.limit(limit + 1)
+
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '{"status": "success", "datas": ['
+
+        last = None
+        count = 0
+        more = False
+        for doc in cursor:
+            # The extra document fetched only tells us there is another page
+            if count == limit:
+                more = True
+                break
+            yield ("," if count else "") + dumps(serialize_accident(doc))
+            last = doc
+            count += 1
+
+        next_cursor = encode_cursor(last) if more else None
+        yield '], "next_cursor": ' + dumps(next_cursor) + "}"
+
+    return Response(stream_with_context(generate()), mimetype="application/json"), 200
 
 
 # ---------------------------
-# DASHBOARD SUMMARY (SAFE)
+# DASHBOARD SUMMARY (PRE-AGGREGATED)
 # ---------------------------
 @accident_bp.route("/summary", methods=["GET"])
 def get_summary():
-    pipeline = [
-        {
-            "$addFields": {
-                "safeDate": {
-                    "$cond": [
-                        { "$eq": [{ "$type": "$date" }, "date"] },
-                        "$date",
-                        {
-                            "$cond": [
-                                { "$eq": [{ "$type": "$date" }, "string"] },
-                                { "$toDate": "$date" },
-                                None
-                            ]
-                        }
-                    ]
-                }
-            }
-        },
-        {
-            "$match": {
-                "safeDate": { "$ne": None }
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "year": { "$year": "$safeDate" },
-                    "month": { "$month": "$safeDate" }
-                },
-                "count": { "$sum": 1 }
-            }
-        },
-        {
-            "$sort": {
-                "_id.year": 1,
-                "_id.month": 1
-            }
-        }
-    ]
-
-    data = []
-    for item in accident_results.aggregate(pipeline):
-        data.append({
-            "month": f'{item["_id"]["year"]}-{str(item["_id"]["month"]).zfill(2)}',
-            "count": item["count"]
-        })
-
-    return jsonify(data), 200
+    # Maintained on every insert, see modules/monthly_stats.py
+    breakdown = request.args.get("breakdown") == "1"
+    return jsonify(monthly_summary(db, breakdown=breakdown)), 200
 
 # ---------------------------
 # SINGLE ACCIDENT DETAILS
@@ -1,19 +1,14 @@
 from flask import request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
+from werkzeug.local import LocalProxy
 
+from extensions import mongo
 from . import auth_bp  # ✅ REQUIRED
 
 
-load_dotenv()
-
-# MongoDB connection (Atlas)
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["accident_db"]
-users = db["users"]
+# MongoDB connection (Atlas) -- shared client, resolved on use
+users = LocalProxy(lambda: mongo.db["users"])
 
 # -------------------------
 # REGISTER
@@ -1,15 +1,13 @@
 from flask import Blueprint, jsonify, request
-from flask_mail import Message
 import os
 
-# ✅ IMPORT MAIL FROM SHARED EXTENSIONS (NO CIRCULAR IMPORT)
-from extensions import mail
+from modules.alert_dispatcher import alert_dispatcher
 
 emails = Blueprint("emails", __name__, url_prefix="/api/v1/emails")
 
 @emails.route("/send-email", methods=["POST"])
 def send_email():
-    data = request.get_json()
+    data = request.get_json() or {}
 
     latitude = data.get("latitude")
     longitude = data.get("longitude")
@@ -24,27 +22,19 @@ def send_email():
             "error": "Email credentials not configured"
         }), 500
 
-    google_map_link = (
-        f"https://www.google.com/maps/search/?api=1&query={latitude},{longitude}"
-    )
-
-    msg = Message(
-        subject=f"🚨 Accident Alert - Severity ({severity})",
+    # Queued for the background sender; the caller doesn't wait on SMTP
+    queued = alert_dispatcher.submit(
+        {"latitude": latitude, "longitude": longitude, "severity": severity, "location": location},
         sender=sender_email,
         recipients=[receiver_email],
-        body=(
-            f"🚨 Accident Alert\n\n"
-            f"Severity: {severity}\n"
-            f"Location: {location}\n"
-            f"Latitude: {latitude}\n"
-            f"Longitude: {longitude}\n\n"
-            f"Google Maps Link:\n{google_map_link}\n\n"
-            f"— Accident Detection System"
-        )
     )
 
-    mail.send(msg)
+    if not queued["queued"]:
+        return jsonify({
+            "error": "Alert queue is full"
+        }), 503
 
     return jsonify({
-        "message": "Email sent successfully"
-    }), 200
+        "message": "Email queued",
+        "coalesced": queued["coalesced"],
+    }), 202
@@ -1,14 +1,25 @@
 import os
 import cv2
 from flask import Blueprint, Response, jsonify, request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 from datetime import datetime
-from pymongo import MongoClient
+import time
+from werkzeug.local import LocalProxy
 
+from extensions import mongo
+from modules.analysis_cache import analysis_cache
+from modules.frame_sampling import SAMPLING_MODES
 from modules.geocode import reverse_geocode
+from modules.jobs import JobQueueFull, analysis_jobs
+from modules.model_registry import DEFAULT_WEIGHTS, weights_digest
+from modules.monthly_stats import record_accident
+from modules.storage import MAX_UPLOAD_BYTES, UploadTooLarge, save_upload
+from modules.broadcast import broadcast_hub
+from modules.detection_sidecar import open_sidecar
 from modules.detect_object_on_video import (
-    detect_object_on_video,
     analyze_video_for_accident,
+    analysis_params,
 )
 
 # -----------------------------
@@ -17,11 +28,10 @@ from modules.detect_object_on_video import (
 public_bp = Blueprint("public", __name__, url_prefix="/api/v1/public")
 
 # -----------------------------
-# DB CONNECTION
+# DB CONNECTION (SHARED CLIENT, RESOLVED ON USE)
 # -----------------------------
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["accident_db"]
-accident_results = db["accident_results"]
+db = LocalProxy(lambda: mongo.db)
+accident_results = LocalProxy(lambda: mongo.db["accident_results"])
 
 # -----------------------------
 # HOME
@@ -33,34 +43,48 @@ def return_home():
 # -----------------------------
 # UPLOAD + ANALYZE VIDEO
 # -----------------------------
-@public_bp.route("/upload-video", methods=["POST"])
-def upload_video():
-    if "video" not in request.files:
-        return jsonify({
-            "status": "error",
-            "message": "No video file received"
-        }), 400
+def parse_sampling(form):
+    mode = form.get("sampling", "all")
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"sampling must be one of: {', '.join(SAMPLING_MODES)}")
 
-    video_file = request.files["video"]
+    options = {}
+    if form.get("stride"):
+        options["stride"] = int(form["stride"])
+    if form.get("sample_fps"):
+        options["sample_fps"] = float(form["sample_fps"])
+    return mode, options
 
-    if video_file.filename == "":
-        return jsonify({
-            "status": "error",
-            "message": "Empty filename"
-        }), 400
 
-    filename = secure_filename(video_file.filename)
-    save_dir = current_app.config["UPLOAD_FOLDER"]
-    os.makedirs(save_dir, exist_ok=True)
+def lookup_analysis(content_hash, sampling, sampling_options):
+    """(cache_key, cached analysis or None, lookup_ms) for this clip + model + params."""
+    start = time.perf_counter()
+    cache_key = analysis_cache.key(
+        content_hash,
+        weights_digest(DEFAULT_WEIGHTS),
+        analysis_params(sampling=sampling, sampling_options=sampling_options),
+    )
+    analysis = analysis_cache.get(cache_key)
+    return cache_key, analysis, (time.perf_counter() - start) * 1000
 
-    save_path = os.path.join(save_dir, filename)
-    video_file.save(save_path)
 
+def process_upload(job, save_path, filename, original_name, content_hash, sampling, sampling_options,
+                   cache_key, lookup_ms):
     # -----------------------------
     # RUN YOLO ANALYSIS
     # -----------------------------
-    analysis = analyze_video_for_accident(save_path)
+    analysis = analyze_video_for_accident(
+        save_path,
+        sampling=sampling,
+        sampling_options=sampling_options,
+        progress=job.update_progress,
+    )
+    analysis_cache.put(cache_key, analysis)
+
+    return record_upload(analysis, filename, original_name, content_hash, cache_hit=False, lookup_ms=lookup_ms)
+
 
+def record_upload(analysis, filename, original_name, content_hash, cache_hit, lookup_ms):
     # -----------------------------
     # CAPTURE ACCIDENT FRAME
     # -----------------------------
@@ -94,6 +118,8 @@ def upload_video():
     # -----------------------------
     record = {
         "video_name": filename,
+        "original_name": original_name,
+        "content_hash": content_hash,
         "result": analysis["result"],
         "severity": analysis["severity"],
         "severityInPercentage": analysis["severityInPercentage"],
@@ -106,19 +132,155 @@ def upload_video():
     }
 
     inserted = accident_results.insert_one(record)
+    record_accident(db, record)
 
     # -----------------------------
-    # RESPONSE TO FRONTEND
+    # JOB RESULT (WHAT THE FRONTEND USED TO GET)
     # -----------------------------
-    return jsonify({
+    return {
         "status": "success",
         "video": filename,
+        "originalName": original_name,
         "analysis": {
             "result": analysis["result"],
             "severity": analysis["severity"],
             "severityInPercentage": analysis["severityInPercentage"],
+            "timings": analysis["timings"],
+            "sampling": analysis["sampling"],
+        },
+        "cache": {
+            "hit": cache_hit,
+            "lookup_ms": round(lookup_ms, 2),
+            "total_hits": analysis_cache.metrics["hits"],
+            "total_misses": analysis_cache.metrics["misses"],
         },
         "accidentId": str(inserted.inserted_id),
+    }
+
+
+@public_bp.route("/upload-video", methods=["POST"])
+def upload_video():
+    try:
+        sampling, sampling_options = parse_sampling(request.form)
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Invalid sampling parameters: {e}"
+        }), 400
+
+    if "video" not in request.files:
+        return jsonify({
+            "status": "error",
+            "message": "No video file received"
+        }), 400
+
+    video_file = request.files["video"]
+
+    if video_file.filename == "":
+        return jsonify({
+            "status": "error",
+            "message": "Empty filename"
+        }), 400
+
+    original_name = secure_filename(video_file.filename)
+    extension = os.path.splitext(original_name)[1] or ".mp4"
+
+    # -----------------------------
+    # STREAM TO DISK (CONTENT-ADDRESSED)
+    # -----------------------------
+    try:
+        stored = save_upload(
+            video_file.stream,
+            current_app.config["UPLOAD_FOLDER"],
+            extension=extension,
+            max_bytes=current_app.config.get("MAX_UPLOAD_BYTES", MAX_UPLOAD_BYTES),
+        )
+    except UploadTooLarge as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 413
+
+    filename = stored.name
+
+    # -----------------------------
+    # RESULT CACHE (SAME CLIP + MODEL + PARAMS)
+    # -----------------------------
+    cache_key, analysis, lookup_ms = lookup_analysis(stored.content_hash, sampling, sampling_options)
+    if analysis is not None:
+        # Nothing to wait for: answer with the result, no job to poll
+        analysis["timings"] = {}  # they belong to the run that filled the cache
+        result = record_upload(analysis, filename, original_name, stored.content_hash,
+                               cache_hit=True, lookup_ms=lookup_ms)
+        return jsonify(dict(
+            result,
+            contentHash=stored.content_hash,
+            size=stored.size,
+            deduplicated=stored.deduplicated,
+        )), 200
+
+    # -----------------------------
+    # QUEUE ANALYSIS (POLL /jobs/<id>)
+    # -----------------------------
+    try:
+        job = analysis_jobs.submit(
+            process_upload,
+            stored.path,
+            filename,
+            original_name,
+            stored.content_hash,
+            sampling,
+            sampling_options,
+            cache_key,
+            lookup_ms,
+            meta={"video": filename, "original_name": original_name, "sampling": sampling},
+        )
+    except JobQueueFull:
+        return jsonify({
+            "status": "error",
+            "message": "Too many videos are being analyzed, try again shortly"
+        }), 503
+
+    return jsonify({
+        "status": "queued",
+        "video": filename,
+        "originalName": original_name,
+        "contentHash": stored.content_hash,
+        "size": stored.size,
+        "deduplicated": stored.deduplicated,
+        "jobId": job.id,
+    }), 202
+
+@public_bp.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({
+        "status": "error",
+        "message": "Upload is too large"
+    }), 413
+
+# -----------------------------
+# ANALYSIS JOBS
+# -----------------------------
+@public_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = analysis_jobs.get(job_id)
+
+    if not job:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found"
+        }), 404
+
+    return jsonify(job), 200
+
+@public_bp.route("/jobs", methods=["GET"])
+def list_jobs():
+    status = request.args.get("status")
+    limit = request.args.get("limit", 50, type=int)
+
+    return jsonify({
+        "status": "success",
+        "jobs": analysis_jobs.list(status=status, limit=limit),
     }), 200
 
 # -----------------------------
@@ -132,14 +294,18 @@ def serve_video(filename):
 # STREAM DETECTION FRAMES (OPTIONAL)
 # -----------------------------
 def generate_frames(path_x=""):
-    yolo_output = detect_object_on_video(path_x)
-    for detection in yolo_output:
-        _, buffer = cv2.imencode(".jpg", detection)
-        frame = buffer.tobytes()
-        yield (
-            b"--frame\r\n"
-            b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
-        )
+    # Every viewer of the same video shares one producer (one inference + one
+    # JPEG encode per frame); see modules.broadcast
+    subscriber = broadcast_hub.subscribe(path_x)
+    try:
+        for frame in subscriber:
+            yield (
+                b"--frame\r\n"
+                b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
+            )
+    finally:
+        # Runs on client disconnect too (GeneratorExit)
+        subscriber.close()
 
 @public_bp.route("/detect/<filename>", methods=["GET"])
 def detect_video(filename):
@@ -148,3 +314,32 @@ def detect_video(filename):
         generate_frames(path_x=video_path),
         mimetype="multipart/x-mixed-replace; boundary=frame"
     )
+
+# -----------------------------
+# STORED DETECTIONS (OVERLAYS, NO INFERENCE)
+# -----------------------------
+@public_bp.route("/detections/<filename>", methods=["GET"])
+def get_detections(filename):
+    video_path = os.path.join("static", "videos", secure_filename(filename))
+    sidecar = open_sidecar(video_path, frames_needed=0)
+
+    if sidecar is None:
+        return jsonify({
+            "status": "error",
+            "message": "No stored detections for this video, stream /detect first"
+        }), 404
+
+    start = request.args.get("start", 0, type=int)
+    end = request.args.get("end", sidecar.frames, type=int)
+
+    return jsonify({
+        "status": "success",
+        "video": filename,
+        "fps": sidecar.meta["fps"],
+        "frames": sidecar.frames,
+        "complete": sidecar.complete,
+        "names": sidecar.names,
+        "start": start,
+        "end": min(end, sidecar.frames),
+        "detections": sidecar.rows(start, end),
+    }), 200
@@ -1,3 +1,126 @@
+import threading
+import time
+
 from flask_mail import Mail
+from pymongo import MongoClient, monitoring
 
 mail = Mail()
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters fed by pymongo's CMAP events.
+
+    Checkout events fire on the thread doing the checkout, so the wait for
+    a free connection is measured with a thread-local start time.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {
+            "connections_open": 0,
+            "checked_out": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    def _add(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = time.perf_counter() - getattr(self._local, "started", time.perf_counter())
+        with self._lock:
+            self.stats["checked_out"] += 1
+            self.stats["checkouts"] += 1
+            self.stats["wait_seconds_total"] += waited
+            self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+
+    def connection_check_out_failed(self, event):
+        self._add("checkout_failures")
+
+    def connection_checked_in(self, event):
+        self._add("checked_out", -1)
+
+    def connection_created(self, event):
+        self._add("connections_open")
+
+    def connection_closed(self, event):
+        self._add("connections_open", -1)
+
+    # Pool-level events we don't track
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+class Mongo:
+    """One MongoClient (and so one pool) for the whole process.
+
+    The client is created on first use, not at import, so the app starts
+    and imports cleanly without a reachable database.
+    """
+
+    def __init__(self):
+        self.config = {}
+        self.pool_metrics = PoolMetrics()
+        self._client = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.config = {
+            "uri": app.config.get("MONGO_URI"),
+            "db_name": app.config.get("MONGO_DB_NAME", "accident_db"),
+            "max_pool_size": int(app.config.get("MONGO_MAX_POOL_SIZE", 50)),
+            "min_pool_size": int(app.config.get("MONGO_MIN_POOL_SIZE", 0)),
+            "timeout_ms": int(app.config.get("MONGO_TIMEOUT_MS", 5000)),
+            "read_preference": app.config.get("MONGO_READ_PREFERENCE", "primary"),
+        }
+        app.extensions["mongo"] = self
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    timeout = self.config["timeout_ms"]
+                    self._client = MongoClient(
+                        self.config["uri"],
+                        maxPoolSize=self.config["max_pool_size"],
+                        minPoolSize=self.config["min_pool_size"],
+                        serverSelectionTimeoutMS=timeout,
+                        connectTimeoutMS=timeout,
+                        waitQueueTimeoutMS=timeout,
+                        readPreference=self.config["read_preference"],
+                        event_listeners=[self.pool_metrics],
+                    )
+        return self._client
+
+    @property
+    def db(self):
+        return self.client[self.config["db_name"]]
+
+    def pool_stats(self):
+        stats = dict(self.pool_metrics.stats)
+        stats["max_pool_size"] = self.config.get("max_pool_size")
+        stats["client_created"] = self._client is not None
+        return stats
+
+
+mongo = Mongo()
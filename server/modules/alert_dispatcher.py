@@ -0,0 +1,298 @@
+import atexit
+import os
+import smtplib
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+
+from flask_mail import Message
+
+from extensions import mail
+
+SEND_ERRORS = (smtplib.SMTPException, OSError)
+
+
+def location_key(alert, grid=0.001):
+    """Alerts from the same ~100 m cell (or same address) share a digest."""
+    try:
+        return (round(float(alert["latitude"]) / grid), round(float(alert["longitude"]) / grid))
+    except (TypeError, ValueError):
+        return alert.get("location") or "unknown"
+
+
+def google_map_link(alert):
+    return f"https://www.google.com/maps/search/?api=1&query={alert['latitude']},{alert['longitude']}"
+
+
+def build_message(sender, recipients, alerts):
+    first = alerts[0]
+
+    if len(alerts) == 1:
+        subject = f"🚨 Accident Alert - Severity ({first['severity']})"
+        body = (
+            f"🚨 Accident Alert\n\n"
+            f"Severity: {first['severity']}\n"
+            f"Location: {first['location']}\n"
+            f"Latitude: {first['latitude']}\n"
+            f"Longitude: {first['longitude']}\n\n"
+            f"Google Maps Link:\n{google_map_link(first)}\n\n"
+            f"— Accident Detection System"
+        )
+    else:
+        subject = f"🚨 {len(alerts)} Accident Alerts - {first['location']}"
+        lines = [
+            f"- {time.strftime('%H:%M:%S', time.localtime(a['received_at']))}"
+            f"  Severity: {a['severity']}  ({a['latitude']}, {a['longitude']})"
+            for a in alerts
+        ]
+        body = (
+            f"🚨 {len(alerts)} Accident Alerts near {first['location']}\n\n"
+            + "\n".join(lines)
+            + f"\n\nGoogle Maps Link:\n{google_map_link(first)}\n\n"
+            f"— Accident Detection System"
+        )
+
+    return Message(subject=subject, sender=sender, recipients=list(recipients), body=body)
+
+
+class Digest:
+    def __init__(self, key, sender, recipients, due_at):
+        self.key = key
+        self.sender = sender
+        self.recipients = recipients
+        self.alerts = []
+        self.due_at = due_at
+        self.attempts = 0
+
+
+class AlertDispatcher:
+    """Background sender for alert mail.
+
+    submit() only queues; one worker thread sends over a single SMTP
+    connection that stays open between messages and is closed after
+    `idle_timeout` seconds without mail.
+
+    - Coalescing: the first alert for a location goes out right away. Alerts
+      for the same location within `coalesce_seconds` of the last mail are
+      held and sent together as one digest when the window ends.
+    - Rate limit: at most `rate_limit` mails per recipient per `rate_window`
+      seconds. Over the limit, the digest waits (and keeps collecting).
+    - Retry: failed sends are retried with exponential backoff, up to
+      `max_retries` times, then dropped.
+    """
+
+    def __init__(self, coalesce_seconds=30.0, rate_limit=20, rate_window=3600.0,
+                 max_retries=3, retry_delay=2.0, idle_timeout=60.0, max_pending=500):
+        self.coalesce_seconds = coalesce_seconds
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+        self.max_pending = max_pending
+
+        self.app = None
+        self._pending = OrderedDict()
+        self._last_sent = {}
+        self._sent_at = defaultdict(deque)
+        self._cond = threading.Condition()
+        self._worker = None
+        self._stopping = False
+
+        self._conn = None
+        self._conn_used_at = 0.0
+
+        self.metrics = {
+            "submitted": 0,
+            "coalesced": 0,
+            "sent": 0,
+            "alerts_sent": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failed": 0,
+            "dropped_full": 0,
+            "connections_opened": 0,
+        }
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["alert_dispatcher"] = self
+
+    def _start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._worker.start()
+            atexit.register(self.close)
+
+    # -----------------------------
+    # PRODUCER SIDE
+    # -----------------------------
+    def submit(self, alert, sender, recipients):
+        alert = dict(alert, received_at=time.time())
+        recipients = tuple(recipients)
+        key = (recipients, location_key(alert))
+
+        with self._cond:
+            self.metrics["submitted"] += 1
+            digest = self._pending.get(key)
+
+            if digest is not None:
+                digest.alerts.append(alert)
+                self.metrics["coalesced"] += 1
+                return {"queued": True, "coalesced": True}
+
+            if len(self._pending) >= self.max_pending:
+                self.metrics["dropped_full"] += 1
+                return {"queued": False, "coalesced": False}
+
+            now = time.monotonic()
+            due_at = max(now, self._last_sent.get(key, float("-inf")) + self.coalesce_seconds)
+            digest = Digest(key, sender, recipients, due_at)
+            digest.alerts.append(alert)
+            self._pending[key] = digest
+
+            self._start()
+            self._cond.notify()
+
+        return {"queued": True, "coalesced": False}
+
+    # -----------------------------
+    # WORKER SIDE
+    # -----------------------------
+    def _rate_limited_until(self, recipients, now):
+        until = now
+        for recipient in recipients:
+            sent = self._sent_at[recipient]
+            while sent and now - sent[0] >= self.rate_window:
+                sent.popleft()
+            if len(sent) >= self.rate_limit:
+                until = max(until, sent[0] + self.rate_window)
+        return until
+
+    def _next_due(self):
+        """Pop the next digest that may be sent now, or return how long to wait."""
+        now = time.monotonic()
+        wait = None
+
+        for key, digest in list(self._pending.items()):
+            if digest.due_at > now:
+                wait = digest.due_at - now if wait is None else min(wait, digest.due_at - now)
+                continue
+
+            limited_until = self._rate_limited_until(digest.recipients, now)
+            if limited_until > now:
+                digest.due_at = limited_until
+                self.metrics["rate_limited"] += 1
+                wait = limited_until - now if wait is None else min(wait, limited_until - now)
+                continue
+
+            del self._pending[key]
+            return digest, None
+
+        return None, wait
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = mail.connect().__enter__()
+            self.metrics["connections_opened"] += 1
+        self._conn_used_at = time.monotonic()
+        return self._conn
+
+    def _close_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.__exit__(None, None, None)
+            except SEND_ERRORS:
+                pass
+            self._conn = None
+
+    def _send(self, digest):
+        msg = build_message(digest.sender, digest.recipients, digest.alerts)
+        try:
+            self._connection().send(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The kept-alive connection was dropped by the server; reconnect once
+            self._conn = None
+            self._connection().send(msg)
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                with self._cond:
+                    digest, wait = self._next_due()
+                    if digest is None:
+                        if self._stopping:
+                            break
+                        if self._conn is not None:
+                            idle_left = self._conn_used_at + self.idle_timeout - time.monotonic()
+                            wait = idle_left if wait is None else min(wait, idle_left)
+                        if wait is None or wait > 0:
+                            self._cond.wait(wait)
+                        if self._conn is not None and time.monotonic() - self._conn_used_at >= self.idle_timeout:
+                            self._close_connection()
+                        continue
+
+                try:
+                    self._send(digest)
+                except Exception as e:
+                    # Anything, not just SMTP errors: one bad digest must not kill the worker
+                    self._close_connection()
+                    self._retry(digest, e)
+                    continue
+
+                now = time.monotonic()
+                with self._cond:
+                    self._last_sent[digest.key] = now
+                    for recipient in digest.recipients:
+                        self._sent_at[recipient].append(now)
+                    self.metrics["sent"] += 1
+                    self.metrics["alerts_sent"] += len(digest.alerts)
+
+            self._close_connection()
+
+    def _retry(self, digest, error):
+        with self._cond:
+            digest.attempts += 1
+            if digest.attempts > self.max_retries or self._stopping:
+                self.metrics["failed"] += 1
+                print(f"❌ Alert mail dropped after {digest.attempts} attempts: {error}")
+                return
+
+            self.metrics["retries"] += 1
+            digest.due_at = time.monotonic() + self.retry_delay * 2 ** (digest.attempts - 1)
+            print(f"⚠️ Alert mail failed, retry {digest.attempts}/{self.max_retries}: {error}")
+
+            # Alerts that arrived for the same location meanwhile join the retry
+            newer = self._pending.pop(digest.key, None)
+            if newer is not None:
+                digest.alerts.extend(newer.alerts)
+            self._pending[digest.key] = digest
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self.metrics,
+                pending_digests=len(self._pending),
+                pending_alerts=sum(len(d.alerts) for d in self._pending.values()),
+                connection_open=self._conn is not None,
+            )
+
+    def close(self, timeout=10.0):
+        """Send what is already due, then stop the worker."""
+        with self._cond:
+            self._stopping = True
+            now = time.monotonic()
+            for digest in self._pending.values():
+                digest.due_at = min(digest.due_at, now)
+            self._cond.notify()
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+
+alert_dispatcher = AlertDispatcher(
+    coalesce_seconds=float(os.getenv("ALERT_COALESCE_SECONDS", "30")),
+    rate_limit=int(os.getenv("ALERT_RATE_LIMIT", "20")),
+    rate_window=float(os.getenv("ALERT_RATE_WINDOW_SECONDS", "3600")),
+    max_retries=int(os.getenv("ALERT_MAX_RETRIES", "3")),
+    idle_timeout=float(os.getenv("ALERT_SMTP_IDLE_SECONDS", "60")),
+)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import cv2
+
+CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", os.path.join("instance", "analysis_cache"))
+MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "500"))
+MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+
+class AnalysisCache:
+    """On-disk LRU of analyzer results.
+
+    Entries are keyed by (video content hash, model weights hash, analyzer
+    parameters) and stored as <key>.json plus <key>.jpg for the accident
+    frame. Recency is the entry's mtime, refreshed on every hit; the oldest
+    entries go once the store is over max_entries or max_bytes.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def key(video_hash, weights_hash, params):
+        raw = json.dumps(
+            {"video": video_hash, "weights": weights_hash, "params": params},
+            sort_keys=True,
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _paths(self, key):
+        return os.path.join(self.root, f"{key}.json"), os.path.join(self.root, f"{key}.jpg")
+
+    def get(self, key):
+        json_path, frame_path = self._paths(key)
+
+        with self._lock:
+            try:
+                with open(json_path) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self.metrics["misses"] += 1
+                return None
+
+            os.utime(json_path)
+            self.metrics["hits"] += 1
+
+        entry["frame"] = cv2.imread(frame_path) if entry.pop("has_frame", False) else None
+        return entry
+
+    def put(self, key, analysis):
+        os.makedirs(self.root, exist_ok=True)
+        json_path, frame_path = self._paths(key)
+
+        entry = {k: v for k, v in analysis.items() if k != "frame"}
+        entry["has_frame"] = analysis.get("frame") is not None
+        entry["cached_at"] = time.time()
+
+        with self._lock:
+            if entry["has_frame"]:
+                cv2.imwrite(frame_path, analysis["frame"], [cv2.IMWRITE_JPEG_QUALITY, 95])
+
+            # Write the JSON last and atomically, it is what marks the entry as present
+            tmp_path = f"{json_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, json_path)
+
+            self.metrics["stores"] += 1
+            self._enforce_limits()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            json_path = os.path.join(self.root, name)
+            frame_path = json_path[:-len(".json")] + ".jpg"
+            try:
+                size = os.path.getsize(json_path)
+                mtime = os.path.getmtime(json_path)
+            except OSError:
+                continue
+            if os.path.exists(frame_path):
+                size += os.path.getsize(frame_path)
+            entries.append((mtime, size, json_path, frame_path))
+        return sorted(entries)
+
+    def _enforce_limits(self):
+        entries = self._entries()
+        total = sum(e[1] for e in entries)
+
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, json_path, frame_path = entries.pop(0)
+            for path in (json_path, frame_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= size
+            self.metrics["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            entries = self._entries() if os.path.isdir(self.root) else []
+            lookups = self.metrics["hits"] + self.metrics["misses"]
+            return dict(
+                self.metrics,
+                entries=len(entries),
+                bytes=sum(e[1] for e in entries),
+                hit_rate=round(self.metrics["hits"] / lookups, 3) if lookups else None,
+            )
+
+
+analysis_cache = AnalysisCache()
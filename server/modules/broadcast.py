@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from modules.detect_object_on_video import detect_object_on_video
+from modules.frame_sampling import FALLBACK_FPS
+from modules.frame_source import video_fps
+from modules.model_registry import DEFAULT_WEIGHTS
+
+SUBSCRIBER_BUFFER = int(os.getenv("BROADCAST_SUBSCRIBER_BUFFER", "2"))
+JPEG_QUALITY = int(os.getenv("BROADCAST_JPEG_QUALITY", "80"))
+
+
+class Subscriber:
+    """One viewer. Holds at most `maxlen` encoded frames; older ones are dropped."""
+
+    def __init__(self, broadcast, maxlen):
+        self.broadcast = broadcast
+        self.frames = deque(maxlen=maxlen)
+        self.dropped = 0
+        self.sent = 0
+
+    def __iter__(self):
+        cond = self.broadcast.cond
+        while True:
+            with cond:
+                cond.wait_for(lambda: self.frames or self.broadcast.ended)
+                if not self.frames:
+                    return
+                jpeg = self.frames.popleft()
+            self.sent += 1
+            yield jpeg
+
+    def close(self):
+        self.broadcast.unsubscribe(self)
+
+
+class Broadcast:
+    """One producer thread per (video, weights): infer and encode once, fan out to subscribers.
+
+    Frames are published at the video's own frame rate, so a viewer that keeps
+    up sees every frame; only a viewer that falls behind loses old ones.
+    """
+
+    def __init__(self, hub, key, video_path):
+        self.hub = hub
+        self.key = key
+        self.video_path = video_path
+        self.cond = threading.Condition()
+        self.subscribers = set()
+        self.ended = False
+        self.started_at = time.time()
+        self.fps = video_fps(video_path) or FALLBACK_FPS
+
+        self.frames = 0
+        self.encode_seconds = 0.0
+        self.encode_max = 0.0
+        self.dropped = 0
+        self.late_frames = 0
+
+        self._thread = threading.Thread(target=self._run, name=f"broadcast-{os.path.basename(video_path)}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def subscribe(self, maxlen=SUBSCRIBER_BUFFER):
+        subscriber = Subscriber(self, maxlen)
+        with self.cond:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.cond:
+            self.subscribers.discard(subscriber)
+            self.dropped += subscriber.dropped
+            if not self.subscribers:
+                # Last viewer gone: the producer stops at its next frame
+                self.ended = True
+                self.cond.notify_all()
+
+    def _publish(self, jpeg):
+        with self.cond:
+            for subscriber in self.subscribers:
+                if len(subscriber.frames) == subscriber.frames.maxlen:
+                    subscriber.dropped += 1
+                subscriber.frames.append(jpeg)
+            self.cond.notify_all()
+
+    def _sleep_until(self, due):
+        """Hold the producer until `due`; wakes early when the last viewer leaves."""
+        remaining = due - time.perf_counter()
+        if remaining > 0:
+            with self.cond:
+                self.cond.wait_for(lambda: self.ended, remaining)
+        return remaining
+
+    def _run(self):
+        frames = detect_object_on_video(self.video_path)
+        interval = 1.0 / self.fps
+        due = time.perf_counter()
+        try:
+            for img in frames:
+                if self.ended:
+                    break
+
+                start = time.perf_counter()
+                ok, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+                elapsed = time.perf_counter() - start
+                self.frames += 1
+                self.encode_seconds += elapsed
+                self.encode_max = max(self.encode_max, elapsed)
+
+                if ok:
+                    self._publish(buffer.tobytes())
+
+                due += interval
+                if self._sleep_until(due) < -interval:
+                    # Inference is slower than real time: carry on from now, no catch-up burst
+                    self.late_frames += 1
+                    due = time.perf_counter()
+        except Exception as e:
+            print(f"❌ Broadcast of {self.video_path} failed: {e}")
+        finally:
+            # Closes the decoder thread behind detect_object_on_video
+            frames.close()
+            with self.cond:
+                self.ended = True
+                self.cond.notify_all()
+            self.hub._finished(self)
+
+    def stats(self):
+        with self.cond:
+            subscribers = len(self.subscribers)
+            dropped = self.dropped + sum(s.dropped for s in self.subscribers)
+        return {
+            "video": os.path.basename(self.video_path),
+            "subscribers": subscribers,
+            "frames": self.frames,
+            "fps": round(self.fps, 2),
+            "late_frames": self.late_frames,
+            "encode_ms_avg": round(1000 * self.encode_seconds / self.frames, 2) if self.frames else 0.0,
+            "encode_ms_max": round(1000 * self.encode_max, 2),
+            "dropped_for_slow_clients": dropped,
+            "running_s": round(time.time() - self.started_at, 1),
+        }
+
+
+class BroadcastHub:
+    def __init__(self, weights=DEFAULT_WEIGHTS):
+        self.weights = weights
+        self._broadcasts = {}
+        self._lock = threading.Lock()
+        self.metrics = {"producers_started": 0, "subscriptions": 0}
+
+    def subscribe(self, video_path):
+        """Join the running broadcast of video_path, starting one if needed."""
+        key = (os.path.abspath(video_path), self.weights)
+        with self._lock:
+            self.metrics["subscriptions"] += 1
+            broadcast = self._broadcasts.get(key)
+            if broadcast is None or broadcast.ended:
+                broadcast = self._broadcasts[key] = Broadcast(self, key, video_path)
+                subscriber = broadcast.subscribe()
+                broadcast.start()
+                self.metrics["producers_started"] += 1
+                return subscriber
+            return broadcast.subscribe()
+
+    def _finished(self, broadcast):
+        with self._lock:
+            if self._broadcasts.get(broadcast.key) is broadcast:
+                del self._broadcasts[broadcast.key]
+
+    def stats(self):
+        with self._lock:
+            broadcasts = list(self._broadcasts.values())
+        live = [b.stats() for b in broadcasts]
+        return dict(
+            self.metrics,
+            producers=len(live),
+            subscribers=sum(b["subscribers"] for b in live),
+            broadcasts=live,
+        )
+
+
+broadcast_hub = BroadcastHub()
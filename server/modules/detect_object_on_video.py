@@ -1,8 +1,14 @@
-from ultralytics import YOLO
 import cv2
 import math
 import cvzone
 import os
+import time
+
+from modules.detection_sidecar import EMPTY_COLUMNS, SidecarWriter, open_sidecar, result_columns
+from modules.frame_sampling import FrameSampler
+from modules.frame_source import PrefetchFrameSource
+from modules.geometry import any_overlap
+from modules.model_registry import get_model
 
 def calculate_iou(box1, box2):
     xA = max(box1[0], box2[0])
@@ -20,110 +26,216 @@ def calculate_iou(box1, box2):
     return interArea / float(box1Area + box2Area - interArea)
 
 
-def detect_object_on_video(video_path):
-    video_capture = video_path
-    cap = cv2.VideoCapture(video_capture)
-    frame_width = int(cap.get(3))
-    frame_height = int(cap.get(4))
-
-    model = YOLO('./models/yolov8n.pt')
-    classNames = ["person", "bicycle", "car", "motorbike", "aeroplane", "bus", "train", "truck", "boat",
-                  "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat",
-                  "dog", "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack", "umbrella",
-                  "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball", "kite", "baseball bat",
-                  "baseball glove", "skateboard", "surfboard", "tennis racket", "bottle", "wine glass", "cup",
-                  "fork", "knife", "spoon", "bowl", "banana", "apple", "sandwich", "orange", "broccoli",
-                  "carrot", "hot dog", "pizza", "donut", "cake", "chair", "sofa", "pottedplant", "bed",
-                  "diningtable", "toilet", "tvmonitor", "laptop", "mouse", "remote", "keyboard", "cell phone",
-                  "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase", "scissors",
-                  "teddy bear", "hair drier", "toothbrush"
-                  ]
-    while True:
-        sucess, img = cap.read()
-        if not sucess:
-            break
-        results = model(img,stream=True)
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                x1, y1, x2, y2 = box.xyxy[0]
-                x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                w, h = x2 - x1, y2 - y1
-
-                conf = math.ceil((box.conf[0] * 100)) / 100
-                cls = int(box.cls[0])
-                label = classNames[cls].upper()
-                cvzone.cornerRect(img, (x1, y1, w, h))
-                cvzone.putTextRect(img, f'{label} {conf}', (max(0, x1), max(35, y1)), colorR=(0,165,255))
-        yield img
+CLASS_NAMES = ["person", "bicycle", "car", "motorbike", "aeroplane", "bus", "train", "truck", "boat",
+               "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat",
+               "dog", "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack", "umbrella",
+               "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball", "kite", "baseball bat",
+               "baseball glove", "skateboard", "surfboard", "tennis racket", "bottle", "wine glass", "cup",
+               "fork", "knife", "spoon", "bowl", "banana", "apple", "sandwich", "orange", "broccoli",
+               "carrot", "hot dog", "pizza", "donut", "cake", "chair", "sofa", "pottedplant", "bed",
+               "diningtable", "toilet", "tvmonitor", "laptop", "mouse", "remote", "keyboard", "cell phone",
+               "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase", "scissors",
+               "teddy bear", "hair drier", "toothbrush"
+               ]
+
+
+def _commit_sidecar(writer, complete):
+    try:
+        writer.commit(complete=complete)
+    except OSError as e:
+        # Only a missed shortcut for the next run, never fail the caller
+        print(f"⚠️ Could not write detection sidecar for {writer.video_path}: {e}")
+
+
+def _draw_detections(img, cls, conf, xyxy):
+    for c, p, box in zip(cls, conf, xyxy):
+        x1, y1, x2, y2 = (int(v) for v in box)
+        w, h = x2 - x1, y2 - y1
+
+        conf = math.ceil((p * 100)) / 100
+        label = CLASS_NAMES[int(c)].upper()
+        cvzone.cornerRect(img, (x1, y1, w, h))
+        cvzone.putTextRect(img, f'{label} {conf}', (max(0, x1), max(35, y1)), colorR=(0,165,255))
+
+
+def detect_object_on_video(video_path, use_sidecar=True):
+    # A complete sidecar means this video was already run through these
+    # weights: replay its boxes and skip the model entirely
+    sidecar = open_sidecar(video_path) if use_sidecar else None
+    model = None if sidecar is not None else get_model()
+
+    source = PrefetchFrameSource(video_path).start()
+    writer = SidecarWriter(video_path, model.names, source.fps) if use_sidecar and sidecar is None else None
+    reached_end = False
+    try:
+        for index, img in enumerate(source):
+            if sidecar is not None:
+                columns = sidecar.frame(index)
+            else:
+                columns = EMPTY_COLUMNS
+                for r in model(img, stream=True):
+                    columns = result_columns(r)
+                if writer is not None:
+                    writer.add(index, *columns)
+
+            _draw_detections(img, *columns)
+            yield img
+        reached_end = True
+    finally:
+        # Runs on client disconnect too (GeneratorExit)
+        source.close()
+        if writer is not None and writer.frames:
+            _commit_sidecar(writer, complete=reached_end)
 
 cv2.destroyAllWindows()
 
 
-def analyze_video_for_accident(video_path, max_frames=150):
-    cap = cv2.VideoCapture(video_path)
-    model = YOLO("./models/yolov8n.pt")
+VEHICLE_CLASSES = ["car", "truck", "bus", "motorbike"]
+COLLISION_IOU = 0.15
+DEFAULT_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "8"))
 
-    vehicle_classes = ["car", "truck", "bus", "motorbike"]
+# The original rule: 5 colliding frames for an accident, 10 for High, counted
+# in the clip's own frames. A sampled frame counts for every frame of video it
+# stands for, so "all" decides exactly as before at any fps and the other
+# modes compare the same stretch of video.
+ACCIDENT_MIN_FRAMES = 5
+HIGH_SEVERITY_FRAMES = 10
 
-    accident_frames = 0
-    max_confidence = 0
-    frame_count = 0
 
-    best_frame = None  # ✅ FIX: initialize here
+def _vehicle_boxes(cls, conf, xyxy, names):
+    vehicles = []
+    for c, p, box in zip(cls, conf, xyxy):
+        label = names[int(c)]
 
-    while cap.isOpened() and frame_count < max_frames:
-        success, frame = cap.read()
-        if not success:
-            break
+        if label in VEHICLE_CLASSES:
+            x1, y1, x2, y2 = map(int, box)
+            vehicles.append((x1, y1, x2, y2, float(p)))
+    return vehicles
 
-        results = model(frame)
-        vehicles = []
 
-        for r in results:
-            for box in r.boxes:
-                cls = int(box.cls[0])
-                label = model.names[cls]
-                conf = float(box.conf[0])
+def _has_collision(vehicles, collision_iou=COLLISION_IOU):
+    # Check overlap (collision-like) across every pair of vehicles at once
+    return any_overlap([v[:4] for v in vehicles], collision_iou)
 
-                if label in vehicle_classes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    vehicles.append((x1, y1, x2, y2, conf))
-                    max_confidence = max(max_confidence, conf)
 
-        # Check overlap (collision-like)
-        collision_detected = False
-        for i in range(len(vehicles)):
-            for j in range(i + 1, len(vehicles)):
-                iou = calculate_iou(vehicles[i][:4], vehicles[j][:4])
-                if iou > 0.15:
-                    collision_detected = True
-                    break
+def analysis_params(max_frames=150, sampling="all", sampling_options=None, collision_iou=COLLISION_IOU):
+    """Everything besides the video and the weights that changes the analyzer's answer."""
+    return {
+        "max_frames": max_frames,
+        "sampling": sampling,
+        "sampling_options": sampling_options or {},
+        "vehicle_classes": VEHICLE_CLASSES,
+        "collision_iou": collision_iou,
+        "accident_min_frames": ACCIDENT_MIN_FRAMES,
+        "high_severity_frames": HIGH_SEVERITY_FRAMES,
+    }
 
-        if collision_detected:
-            accident_frames += 1
 
-            # Save first strong collision frame
-            if best_frame is None:
-                best_frame = frame.copy()
+def analyze_video_for_accident(video_path, max_frames=150, batch_size=DEFAULT_BATCH_SIZE,
+                               sampling="all", sampling_options=None, progress=None,
+                               collision_iou=COLLISION_IOU, use_sidecar=True):
+    batch_size = max(1, int(batch_size))
 
-        frame_count += 1
+    # Re-analysis (other thresholds or sampling) of a clip whose first
+    # max_frames were already inferred reads the boxes from the sidecar
+    sidecar = open_sidecar(video_path, frames_needed=max_frames) if use_sidecar else None
+    model = get_model() if sidecar is None else None
+    names = model.names if sidecar is None else sidecar.names
 
-    cap.release()
+    # Only "all" infers a contiguous run of frames, which is what a sidecar holds
+    writer = None
+
+    accident_frames = 0
+    collision_seconds = 0.0
+    max_confidence = 0
+
+    best_frame = None  # ✅ FIX: initialize here
+    inference_seconds = 0.0
+
+    def run_batch(batch):
+        nonlocal accident_frames, collision_seconds, max_confidence, best_frame, inference_seconds
+
+        if sidecar is not None:
+            detections = [sidecar.frame(index) for _, _, index in batch]
+        else:
+            # One forward pass for the whole batch, results come back in frame order
+            start = time.perf_counter()
+            results = model([frame for frame, _, _ in batch], verbose=False)
+            inference_seconds += time.perf_counter() - start
+
+            detections = [result_columns(result) for result in results]
+            if writer is not None:
+                for (_, _, index), columns in zip(batch, detections):
+                    writer.add(index, *columns)
+
+        for (frame, seconds, _), columns in zip(batch, detections):
+            vehicles = _vehicle_boxes(*columns, names)
+            for vehicle in vehicles:
+                max_confidence = max(max_confidence, vehicle[4])
+
+            if _has_collision(vehicles, collision_iou):
+                accident_frames += 1
+                collision_seconds += seconds
+
+                # Save first strong collision frame
+                if best_frame is None:
+                    best_frame = frame.copy()
+
+        if progress is not None:
+            progress(frames_processed=sampler.frames_seen, frames_sampled=sampler.frames_taken)
+
+    batch = []
+    # Decoding runs ahead on its own thread while the model works on a batch
+    with PrefetchFrameSource(video_path, max_queue=2 * batch_size, max_frames=max_frames) as source:
+        sampler = FrameSampler(sampling, video_fps=source.fps, **(sampling_options or {}))
+        if use_sidecar and sidecar is None and sampling == "all":
+            writer = SidecarWriter(video_path, names, source.fps)
+
+        for index, frame in enumerate(source):
+            take, seconds = sampler.step(frame)
+            if not take:
+                continue
+
+            batch.append((frame, seconds, index))
+
+            if len(batch) == batch_size:
+                run_batch(batch)
+                batch = []
+
+        if batch:
+            run_batch(batch)
+
+    if writer is not None and writer.frames:
+        # Stopping short of max_frames means the decoder hit the end of the clip
+        _commit_sidecar(writer, complete=max_frames is None or writer.frames < max_frames)
+
+    # Seconds back to frames of the source video (FALLBACK_FPS if it reports none)
+    collision_video_frames = collision_seconds * sampler.video_fps
+
+    timings = dict(source.stats, inference_seconds=inference_seconds, sidecar=sidecar is not None)
+    sampling_stats = dict(
+        sampler.stats(),
+        collision_frames=accident_frames,
+        collision_seconds=round(collision_seconds, 3),
+        collision_video_frames=round(collision_video_frames, 2),
+    )
 
     # -----------------------------
     # FINAL DECISION
     # -----------------------------
-    if accident_frames >= 5:
+
+    if collision_video_frames + 1e-6 >= ACCIDENT_MIN_FRAMES:
         severity_percent = int(max_confidence * 100)
 
-        severity = "High" if accident_frames >= 10 else "Medium"
+        severity = "High" if collision_video_frames + 1e-6 >= HIGH_SEVERITY_FRAMES else "Medium"
 
         return {
             "result": "Accident",
             "severity": severity,
             "severityInPercentage": severity_percent,
             "frame": best_frame,  # may be None, safely handled
+            "timings": timings,
+            "sampling": sampling_stats,
         }
 
     return {
@@ -131,5 +243,6 @@ def analyze_video_for_accident(video_path, max_frames=150):
         "severity": "Low",
         "severityInPercentage": int(max_confidence * 100),
         "frame": None,  # ✅ explicit
+        "timings": timings,
+        "sampling": sampling_stats,
     }
-
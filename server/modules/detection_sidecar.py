@@ -0,0 +1,208 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from modules.model_registry import DEFAULT_WEIGHTS, weights_digest
+
+SIDECAR_DIR = os.getenv("DETECTION_SIDECAR_DIR", os.path.join("instance", "detections"))
+SIDECAR_VERSION = 1
+
+# Column files; every box of every frame is one row
+COLUMNS = {
+    "frame": np.int32,
+    "cls": np.int16,
+    "conf": np.float32,
+    "xyxy": np.float32,   # (rows, 4)
+}
+
+# (cls, conf, xyxy) of a frame with nothing detected
+EMPTY_COLUMNS = (np.empty(0, np.int16), np.empty(0, np.float32), np.empty((0, 4), np.float32))
+
+
+def _to_numpy(values):
+    # ultralytics hands back torch tensors (possibly on the GPU)
+    if hasattr(values, "cpu"):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+
+def result_columns(result):
+    """(cls, conf, xyxy) arrays for one ultralytics result."""
+    boxes = result.boxes
+    if len(boxes) == 0:
+        return EMPTY_COLUMNS
+    return (
+        _to_numpy(boxes.cls).astype(np.int16),
+        _to_numpy(boxes.conf).astype(np.float32),
+        _to_numpy(boxes.xyxy).astype(np.float32).reshape(-1, 4),
+    )
+
+
+def _video_identity(video_path):
+    st = os.stat(video_path)
+    return {"video": os.path.basename(video_path), "video_size": st.st_size, "video_mtime_ns": st.st_mtime_ns}
+
+
+def sidecar_path(video_path, digest, root=SIDECAR_DIR):
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(root, f"{stem}-{digest[:16]}")
+
+
+class SidecarWriter:
+    """Collects per-frame detections for frames 0, 1, 2, ... and writes them once.
+
+    The sidecar is a directory of .npy columns plus meta.json. It records a
+    contiguous prefix of the video; `complete` says whether that prefix is
+    the whole video. commit() writes to a temp dir and renames it into place.
+    """
+
+    def __init__(self, video_path, names, fps, weights=DEFAULT_WEIGHTS, root=SIDECAR_DIR):
+        self.video_path = video_path
+        self.names = {int(k): v for k, v in dict(names).items()}
+        self.fps = fps
+        self.weights = weights
+        self.root = root
+        self.frames = 0
+        self._chunks = {name: [] for name in COLUMNS}
+
+    def add(self, frame_index, cls, conf, xyxy):
+        if frame_index != self.frames:
+            raise ValueError(f"sidecar frames must be contiguous, expected {self.frames} got {frame_index}")
+        self._chunks["frame"].append(np.full(len(cls), frame_index, np.int32))
+        self._chunks["cls"].append(cls)
+        self._chunks["conf"].append(conf)
+        self._chunks["xyxy"].append(xyxy)
+        self.frames += 1
+
+    def commit(self, complete):
+        digest = weights_digest(self.weights)
+        final = sidecar_path(self.video_path, digest, self.root)
+
+        existing = Sidecar.open(self.video_path, self.weights, self.root)
+        if existing is not None and (existing.complete or existing.frames >= self.frames):
+            return final  # already covers at least as much
+
+        tmp = f"{final}.tmp-{uuid.uuid4().hex[:8]}"
+        os.makedirs(tmp)
+        try:
+            frame = np.concatenate(self._chunks["frame"]) if self.frames else np.empty(0, np.int32)
+            for name, dtype in COLUMNS.items():
+                if self.frames:
+                    column = np.concatenate(self._chunks[name]).astype(dtype)
+                else:
+                    column = np.empty((0, 4) if name == "xyxy" else 0, dtype)
+                np.save(os.path.join(tmp, f"{name}.npy"), column)
+
+            # offsets[i]:offsets[i + 1] are the rows of frame i
+            offsets = np.searchsorted(frame, np.arange(self.frames + 1)).astype(np.int64)
+            np.save(os.path.join(tmp, "offsets.npy"), offsets)
+
+            meta = dict(
+                _video_identity(self.video_path),
+                version=SIDECAR_VERSION,
+                weights=os.path.basename(self.weights),
+                model_digest=digest,
+                names=self.names,
+                fps=self.fps,
+                frames=self.frames,
+                rows=int(len(frame)),
+                complete=bool(complete),
+                created_at=time.time(),
+            )
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump(meta, f)
+
+            if os.path.isdir(final):
+                shutil.rmtree(final, ignore_errors=True)
+            os.replace(tmp, final)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        sidecar_stats.record("written")
+        return final
+
+
+class Sidecar:
+    """Memory-mapped read side. open() returns None when missing or stale."""
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self.names = {int(k): v for k, v in meta["names"].items()}
+        self.frames = meta["frames"]
+        self.complete = meta["complete"]
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+
+    @classmethod
+    def open(cls, video_path, weights=DEFAULT_WEIGHTS, root=SIDECAR_DIR):
+        try:
+            digest = weights_digest(weights)
+            path = sidecar_path(video_path, digest, root)
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            identity = _video_identity(video_path)
+        except (OSError, ValueError):
+            return None
+
+        if meta.get("version") != SIDECAR_VERSION or meta.get("model_digest") != digest:
+            return None
+        if any(meta.get(k) != v for k, v in identity.items() if k != "video"):
+            return None  # the video file changed since the sidecar was written
+
+        try:
+            return cls(path, meta)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def covers(self, frames):
+        return self.complete or self.frames >= frames
+
+    def frame(self, index):
+        """(cls, conf, xyxy) views for one frame; empty past the recorded prefix."""
+        if index >= self.frames:
+            return EMPTY_COLUMNS
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.columns["cls"][start:end], self.columns["conf"][start:end], self.columns["xyxy"][start:end]
+
+    def rows(self, start=0, end=None):
+        """Plain lists for frames [start, end), for JSON responses."""
+        end = self.frames if end is None else min(max(end, 0), self.frames)
+        start = min(max(start, 0), end)
+        lo, hi = self.offsets[start], self.offsets[end]
+        return {
+            name: np.asarray(column[lo:hi]).tolist()
+            for name, column in self.columns.items()
+        }
+
+
+class SidecarStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = {"written": 0, "hits": 0, "misses": 0}
+
+    def record(self, key):
+        with self._lock:
+            self.metrics[key] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.metrics)
+
+
+sidecar_stats = SidecarStats()
+
+
+def open_sidecar(video_path, frames_needed=None, weights=DEFAULT_WEIGHTS):
+    """The sidecar for video_path if it covers frames_needed (None = whole video)."""
+    sidecar = Sidecar.open(video_path, weights)
+    if sidecar is not None and (sidecar.complete if frames_needed is None else sidecar.covers(frames_needed)):
+        sidecar_stats.record("hits")
+        return sidecar
+    sidecar_stats.record("misses")
+    return None
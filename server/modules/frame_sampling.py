@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+
+SAMPLING_MODES = ("all", "stride", "fps", "adaptive")
+
+# Used when the container doesn't report a frame rate
+FALLBACK_FPS = 30.0
+
+# Adaptive mode works on a tiny grayscale copy of each frame
+MOTION_WIDTH = 64
+
+
+class FrameSampler:
+    """Decide which decoded frames are worth sending to the detector.
+
+    step() is called for every decoded frame, in order, and returns
+    (take, seconds). seconds is the stretch of video the sampled frame stands
+    for (time since the previous sampled frame), so per-frame counts can be
+    turned into durations that don't depend on the sampling rate.
+
+    Modes:
+      all      -- every frame (the original behaviour)
+      stride   -- every `stride`-th frame
+      fps      -- about `sample_fps` frames per second of video
+      adaptive -- skip static stretches (at most `max_gap` frames apart) and
+                  sample every frame while motion energy is above
+                  `motion_threshold`, plus `hold` frames after it drops
+    """
+
+    def __init__(self, mode="all", video_fps=None, stride=3, sample_fps=10.0,
+                 motion_threshold=4.0, max_gap=15, hold=5):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+
+        self.mode = mode
+        self.video_fps = video_fps or FALLBACK_FPS
+        self.stride = max(1, int(stride))
+        self.sample_interval = 1.0 / max(float(sample_fps), 1e-6)
+        self.motion_threshold = float(motion_threshold)
+        self.max_gap = max(1, int(max_gap))
+        self.hold = max(0, int(hold))
+
+        self._index = -1
+        self._last_taken = None
+        self._next_sample_time = 0.0
+        self._prev_small = None
+        self._hold_left = 0
+
+        self.frames_seen = 0
+        self.frames_taken = 0
+
+    def _motion(self, frame):
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (MOTION_WIDTH, max(1, h * MOTION_WIDTH // w)),
+                           interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+        prev, self._prev_small = self._prev_small, small
+        if prev is None:
+            return float("inf")
+        return float(np.abs(small - prev).mean())
+
+    def _wants(self, frame):
+        if self.mode == "all":
+            return True
+
+        if self.mode == "stride":
+            return self._index % self.stride == 0
+
+        if self.mode == "fps":
+            t = self._index / self.video_fps
+            if t + 1e-9 >= self._next_sample_time:
+                self._next_sample_time += self.sample_interval
+                # Don't try to catch up after a long gap
+                self._next_sample_time = max(self._next_sample_time, t)
+                return True
+            return False
+
+        # adaptive
+        if self._motion(frame) >= self.motion_threshold:
+            self._hold_left = self.hold
+            return True
+        if self._hold_left > 0:
+            self._hold_left -= 1
+            return True
+        return self._last_taken is None or self._index - self._last_taken >= self.max_gap
+
+    def step(self, frame):
+        self._index += 1
+        self.frames_seen += 1
+
+        if not self._wants(frame):
+            return False, 0.0
+
+        gap = 1 if self._last_taken is None else self._index - self._last_taken
+        self._last_taken = self._index
+        self.frames_taken += 1
+        return True, gap / self.video_fps
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "frames_seen": self.frames_seen,
+            "frames_sampled": self.frames_taken,
+        }
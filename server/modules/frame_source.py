@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+
+import cv2
+
+_END = object()
+
+
+def video_fps(video_path):
+    """Frame rate the container reports, 0.0 if unknown."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return cap.get(cv2.CAP_PROP_FPS) or 0.0
+    finally:
+        cap.release()
+
+
+class PrefetchFrameSource:
+    """Decode a video on a background thread into a bounded queue.
+
+    Iterating yields frames in order. The decoder blocks when the queue is
+    full (backpressure), and close() stops it promptly when the consumer
+    gives up early, e.g. max_frames reached or the HTTP client went away.
+    """
+
+    def __init__(self, video_path, max_queue=16, max_frames=None):
+        self.video_path = video_path
+        self.max_frames = max_frames
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.fps = 0.0
+        self.frame_size = (0, 0)
+
+        self.stats = {
+            "frames_decoded": 0,
+            "frames_consumed": 0,
+            "decode_seconds": 0.0,
+            "producer_blocked_seconds": 0.0,
+            "consumer_wait_seconds": 0.0,
+        }
+
+    def start(self):
+        cap = cv2.VideoCapture(self.video_path)
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_size = (int(cap.get(3)), int(cap.get(4)))
+
+        self._thread = threading.Thread(
+            target=self._decode, args=(cap,), name="frame-decoder", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _put(self, item):
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.stats["producer_blocked_seconds"] += time.perf_counter() - start
+
+    def _decode(self, cap):
+        try:
+            while cap.isOpened() and not self._stop.is_set():
+                if self.max_frames is not None and self.stats["frames_decoded"] >= self.max_frames:
+                    break
+
+                start = time.perf_counter()
+                success, frame = cap.read()
+                self.stats["decode_seconds"] += time.perf_counter() - start
+                if not success:
+                    break
+
+                self.stats["frames_decoded"] += 1
+                if not self._put(frame):
+                    break
+        finally:
+            cap.release()
+            self._put(_END)
+
+    def __iter__(self):
+        if self._thread is None:
+            self.start()
+
+        while True:
+            start = time.perf_counter()
+            item = self._queue.get()
+            self.stats["consumer_wait_seconds"] += time.perf_counter() - start
+
+            if item is _END:
+                return
+            self.stats["frames_consumed"] += 1
+            yield item
+
+    def close(self):
+        self._stop.set()
+
+        # Unblock a decoder waiting on a full queue
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -1,27 +1,251 @@
+"""
+Reverse geocoding with an in-memory LRU in front of a persistent SQLite
+cache. Coordinates are snapped to a grid (GEOCODE_GRID_DEG, ~110 m at the
+default 0.001) so nearby lookups share one entry, and failed lookups are
+cached for a shorter time so a down geocoder isn't hammered.
+
+The backend is pluggable: Nominatim over HTTP by default, or StaticBackend
+for tests and offline runs (set_geocoder(Geocoder(StaticBackend(...)))).
+
+The same file lives in server/modules and model-implementor/modules since
+the two are deployed separately. server/modules/geocode.py is the canonical
+copy: edit it, then copy it over. server/tests/test_shared_modules.py fails
+while the two differ.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
 import requests
 
-def reverse_geocode(lat, lon):
-    url = "https://nominatim.openstreetmap.org/reverse"
-    params = {
-        "lat": lat,
-        "lon": lon,
-        "format": "json"
-    }
-    headers = {
-        "User-Agent": "AccidentDetectionSystem/1.0"
-    }
-
-    response = requests.get(url, params=params, headers=headers)
-    if response.status_code != 200:
-        return "Unknown", "Unknown"
+Location = namedtuple("Location", ["address", "city", "latitude", "longitude", "raw"])
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/reverse"
+USER_AGENT = "AccidentDetectionSystem/1.0"
 
-    data = response.json()
-    address = data.get("display_name", "Unknown")
-    city = (
-        data.get("address", {}).get("city") or
-        data.get("address", {}).get("town") or
-        data.get("address", {}).get("village") or
+_MISSING = object()
+
+
+def _city_from(raw):
+    address = raw.get("address", {})
+    return (
+        address.get("city") or
+        address.get("town") or
+        address.get("village") or
         "Unknown"
     )
 
-    return address, city
+
+class NominatimBackend:
+    def __init__(self, url=NOMINATIM_URL, timeout=5.0, user_agent=USER_AGENT):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+
+    def reverse(self, lat, lon):
+        response = self.session.get(
+            self.url,
+            params={"lat": lat, "lon": lon, "format": "json"},
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Nominatim returned {response.status_code}")
+
+        data = response.json()
+        if "error" in data:
+            return None
+
+        return Location(
+            address=data.get("display_name", "Unknown"),
+            city=_city_from(data),
+            latitude=float(data.get("lat", lat)),
+            longitude=float(data.get("lon", lon)),
+            raw=data,
+        )
+
+
+class StaticBackend:
+    """Answers from a fixed table, {"lat,lon": {"address": ..., "city": ...}}."""
+
+    def __init__(self, places=None, default=None):
+        self.places = places or {}
+        self.default = default
+        self.calls = 0
+
+    def reverse(self, lat, lon):
+        self.calls += 1
+        place = self.places.get(f"{lat},{lon}", self.default)
+        if place is None:
+            return None
+        return Location(place["address"], place.get("city", "Unknown"), lat, lon, place)
+
+
+class Geocoder:
+    def __init__(self, backend, cache_path=None, grid=0.001, ttl=7 * 24 * 3600,
+                 negative_ttl=600, lru_size=256):
+        self.backend = backend
+        self.cache_path = cache_path
+        self.grid = grid
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lru_size = lru_size
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "backend_calls": 0, "failures": 0}
+
+        if cache_path:
+            directory = os.path.dirname(cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._db() as db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS geocode_cache ("
+                    " cell TEXT PRIMARY KEY, payload TEXT, expires_at REAL NOT NULL)"
+                )
+
+    @contextmanager
+    def _db(self):
+        conn = sqlite3.connect(self.cache_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _cell(self, lat, lon):
+        qlat = round(float(lat) / self.grid) * self.grid
+        qlon = round(float(lon) / self.grid) * self.grid
+        return f"{qlat:.6f},{qlon:.6f}"
+
+    # ---- memory tier ----
+    def _memory_get(self, cell, now):
+        entry = self._lru.get(cell)
+        if entry is None:
+            return _MISSING
+        location, expires_at = entry
+        if expires_at <= now:
+            del self._lru[cell]
+            return _MISSING
+        self._lru.move_to_end(cell)
+        return location
+
+    def _memory_put(self, cell, location, expires_at):
+        self._lru[cell] = (location, expires_at)
+        self._lru.move_to_end(cell)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    # ---- disk tier ----
+    def _disk_get(self, cell, now):
+        if not self.cache_path:
+            return _MISSING, None
+        with self._db() as db:
+            row = db.execute(
+                "SELECT payload, expires_at FROM geocode_cache WHERE cell = ?", (cell,)
+            ).fetchone()
+        if row is None or row[1] <= now:
+            return _MISSING, None
+        location = Location(*json.loads(row[0])) if row[0] is not None else None
+        return location, row[1]
+
+    def _disk_put(self, cell, location, expires_at):
+        if not self.cache_path:
+            return
+        payload = json.dumps(list(location)) if location is not None else None
+        with self._db() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO geocode_cache (cell, payload, expires_at) VALUES (?, ?, ?)",
+                (cell, payload, expires_at),
+            )
+
+    def reverse(self, lat, lon):
+        """Location for the coordinates, or None if the lookup failed."""
+        cell = self._cell(lat, lon)
+        now = time.time()
+
+        with self._lock:
+            location = self._memory_get(cell, now)
+            if location is not _MISSING:
+                self.metrics["memory_hits"] += 1
+                return location
+
+            location, expires_at = self._disk_get(cell, now)
+            if location is not _MISSING:
+                self.metrics["disk_hits"] += 1
+                self._memory_put(cell, location, expires_at)
+                return location
+
+        self.metrics["backend_calls"] += 1
+        try:
+            location = self.backend.reverse(lat, lon)
+        except Exception as e:
+            print(f"Geocoding failed for {lat},{lon}: {e}")
+            location = None
+
+        if location is None:
+            self.metrics["failures"] += 1
+            expires_at = now + self.negative_ttl
+        else:
+            expires_at = now + self.ttl
+
+        with self._lock:
+            self._memory_put(cell, location, expires_at)
+            self._disk_put(cell, location, expires_at)
+        return location
+
+    def stats(self):
+        return dict(self.metrics, memory_entries=len(self._lru))
+
+
+_geocoder = None
+
+
+def _backend_from_env():
+    if os.getenv("GEOCODER_BACKEND", "nominatim") == "static":
+        places = {}
+        static_file = os.getenv("GEOCODE_STATIC_FILE")
+        if static_file:
+            with open(static_file) as f:
+                places = json.load(f)
+        return StaticBackend(places, default={"address": "Unknown", "city": "Unknown"})
+    return NominatimBackend(timeout=float(os.getenv("GEOCODE_TIMEOUT_S", "5")))
+
+
+def get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = Geocoder(
+            _backend_from_env(),
+            cache_path=os.getenv("GEOCODE_CACHE_PATH", os.path.join("instance", "geocode_cache.sqlite")),
+            grid=float(os.getenv("GEOCODE_GRID_DEG", "0.001")),
+            ttl=float(os.getenv("GEOCODE_TTL_S", str(7 * 24 * 3600))),
+            negative_ttl=float(os.getenv("GEOCODE_NEGATIVE_TTL_S", "600")),
+        )
+    return _geocoder
+
+
+def set_geocoder(geocoder):
+    global _geocoder
+    _geocoder = geocoder
+
+
+def reverse_geocode(lat, lon):
+    location = get_geocoder().reverse(lat, lon)
+    if location is None:
+        return "Unknown", "Unknown"
+    return location.address, location.city
+
+
+def locate(lat, lon):
+    """Location for the coordinates; if the lookup fails, one with the raw lat/lon and no address."""
+    location = get_geocoder().reverse(lat, lon)
+    if location is None:
+        print(f"No address for {lat},{lon}, using the raw coordinates")
+        return Location("", "Unknown", lat, lon, None)
+    return location
@@ -0,0 +1,133 @@
+"""
+Vectorised bounding-box geometry shared by the server analyzer and the
+edge tracker. Boxes are rows of [x1, y1, x2, y2, ...]; extra columns
+(score, id) are ignored.
+
+The same file lives in server/modules and model-implementor/modules since
+the two are deployed separately. server/modules/geometry.py is the canonical
+copy: edit it, then copy it over. server/tests/test_shared_modules.py fails
+while the two differ.
+"""
+import numpy as np
+
+# Above this many boxes the dense n x n matrix is replaced by a sort-and-sweep
+# broad phase on x, which only scores pairs whose x-ranges overlap.
+BROAD_PHASE_MIN = 128
+
+
+def _as_boxes(boxes):
+    boxes = np.asarray(boxes, dtype=np.float64)
+    if boxes.ndim == 1:
+        boxes = boxes.reshape(-1, 4)
+    return boxes[:, :4]
+
+
+def _area(boxes):
+    return (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+
+
+def _safe_iou(inter, union):
+    # Degenerate boxes get 0 instead of nan, like the scalar calculate_iou
+    out = np.zeros_like(inter)
+    np.divide(inter, union, out=out, where=union != 0)
+    return out
+
+
+def iou_batch(bb_test, bb_gt):
+    """
+    IOU between every box in bb_test and every box in bb_gt, shape (len(bb_test), len(bb_gt)).
+    """
+    bb_test = _as_boxes(bb_test)
+    bb_gt = _as_boxes(bb_gt)
+    if min(len(bb_test), len(bb_gt)) >= BROAD_PHASE_MIN:
+        return _sparse_iou_batch(bb_test, bb_gt)
+    return _dense_iou_batch(bb_test, bb_gt)
+
+
+def _dense_iou_batch(bb_test, bb_gt):
+    """iou_batch for small inputs: every pair, broadcast into one n x m matrix."""
+    bb_test = bb_test[:, None, :]
+    bb_gt = bb_gt[None, :, :]
+
+    w = np.maximum(0., np.minimum(bb_test[..., 2], bb_gt[..., 2]) - np.maximum(bb_test[..., 0], bb_gt[..., 0]))
+    h = np.maximum(0., np.minimum(bb_test[..., 3], bb_gt[..., 3]) - np.maximum(bb_test[..., 1], bb_gt[..., 1]))
+    wh = w * h
+    return _safe_iou(wh, _area(bb_test) + _area(bb_gt) - wh)
+
+
+def pairwise_iou(boxes):
+    """
+    IOU of every unordered pair within one set of boxes. Only the strict upper
+    triangle (i < j) is filled, the rest is 0.
+    """
+    boxes = _as_boxes(boxes)
+    return np.triu(iou_batch(boxes, boxes), k=1)
+
+
+def _pair_iou(a, b):
+    w = np.maximum(0., np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]))
+    h = np.maximum(0., np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]))
+    wh = w * h
+    return _safe_iou(wh, _area(a) + _area(b) - wh)
+
+
+def _sweep_candidates(boxes):
+    """Pairs (i, j) whose x-ranges overlap, found by sorting on x1."""
+    order = np.argsort(boxes[:, 0], kind="stable")
+    x1 = boxes[order, 0]
+    x2 = boxes[order, 2]
+
+    n = len(boxes)
+    starts = np.arange(1, n + 1)
+    # Boxes after position k in x1 order that start before box k ends
+    ends = np.searchsorted(x1, x2, side="left")
+    counts = np.maximum(ends - starts, 0)
+
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    first = np.repeat(np.arange(n), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = np.repeat(starts, counts) + offsets
+
+    i, j = order[first], order[second]
+    return np.minimum(i, j), np.maximum(i, j)
+
+
+def _sparse_iou_batch(bb_test, bb_gt):
+    """iou_batch for large inputs: only pairs found by the x sweep are scored."""
+    n = len(bb_test)
+    i, j = _sweep_candidates(np.vstack((bb_test, bb_gt)))
+    # The sweep returns i < j, so cross pairs have i in bb_test and j in bb_gt
+    cross = (i < n) & (j >= n)
+    i, j = i[cross], j[cross] - n
+
+    out = np.zeros((n, len(bb_gt)))
+    out[i, j] = _pair_iou(bb_test[i], bb_gt[j])
+    return out
+
+
+def overlapping_pairs(boxes, threshold):
+    """
+    Index arrays (i, j), i < j, of every pair of boxes with IOU > threshold.
+    """
+    boxes = _as_boxes(boxes)
+    n = len(boxes)
+    if n < 2:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    if n < BROAD_PHASE_MIN:
+        return np.nonzero(pairwise_iou(boxes) > threshold)
+
+    i, j = _sweep_candidates(boxes)
+    keep = _pair_iou(boxes[i], boxes[j]) > threshold
+    return i[keep], j[keep]
+
+
+def any_overlap(boxes, threshold):
+    """True if any two boxes overlap with IOU > threshold."""
+    i, _ = overlapping_pairs(boxes, threshold)
+    return len(i) > 0
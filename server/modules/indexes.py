@@ -0,0 +1,106 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+# -----------------------------
+# INDEX DEFINITIONS
+# -----------------------------
+# The list endpoint sorts on (date, _id) so keyset pagination can walk an
+# index; the city / severity filters reuse that order after the equality key.
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+    "accident_results": [
+        IndexModel([("date", DESCENDING), ("_id", DESCENDING)], name="date_desc"),
+        IndexModel([("city", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="city_date_desc"),
+        IndexModel([("severity", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="severity_date_desc"),
+        # Dedup for edge replays; records without an event_id are not indexed
+        IndexModel([("event_id", ASCENDING)], unique=True, sparse=True, name="event_id_unique"),
+    ],
+}
+
+
+def ensure_indexes(db):
+    """Create every declared index; already-existing ones are a no-op."""
+    created = {}
+    for collection, models in INDEXES.items():
+        try:
+            created[collection] = db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # e.g. duplicate emails already stored block the unique index
+            print(f"⚠️ Could not create indexes on {collection}: {e}")
+            created[collection] = []
+    return created
+
+
+def verify_indexes(db):
+    """Names of declared indexes that are missing, per collection."""
+    missing = {}
+    for collection, models in INDEXES.items():
+        existing = db[collection].index_information()
+        names = [m.document["name"] for m in models if m.document["name"] not in existing]
+        if names:
+            missing[collection] = names
+    return missing
+
+
+def _plan_summary(explain):
+    stages = []
+    index_names = []
+
+    plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    # Newer servers wrap the classic plan in queryPlan
+    plan = plan.get("queryPlan", plan)
+    while plan:
+        stages.append(plan.get("stage"))
+        if plan.get("indexName"):
+            index_names.append(plan["indexName"])
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+
+    stats = explain.get("executionStats", {})
+    return {
+        "stages": stages,
+        "indexes": index_names,
+        "returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+    }
+
+
+def main_queries(db):
+    accidents = db["accident_results"]
+    sort = [("date", DESCENDING), ("_id", DESCENDING)]
+    return {
+        "login": db["users"].find({"email": "probe@example.com"}).limit(1),
+        "all": accidents.find().sort(sort).limit(50),
+        "all_by_city": accidents.find({"city": "probe"}).sort(sort).limit(50),
+        "all_by_severity": accidents.find({"severity": "High"}).sort(sort).limit(50),
+        "by_id": accidents.find({"_id": 0}).limit(1),
+    }
+
+
+def explain_main_queries(db):
+    report = {}
+    for name, cursor in main_queries(db).items():
+        try:
+            report[name] = _plan_summary(cursor.explain())
+        except (OperationFailure, AttributeError, NotImplementedError) as e:
+            # Plans are diagnostics only; backends without explain (mongomock) just skip them
+            report[name] = {"error": str(e)}
+    return report
+
+
+def bootstrap_indexes(db):
+    ensure_indexes(db)
+
+    missing = verify_indexes(db)
+    if missing:
+        print(f"⚠️ Missing indexes: {missing}")
+    else:
+        print("✅ Mongo indexes verified")
+
+    report = explain_main_queries(db)
+    for name, plan in report.items():
+        print(f"   {name}: {plan}")
+
+    return {"missing": missing, "plans": report}
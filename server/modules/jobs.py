@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, meta=None):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.meta = meta or {}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def update_progress(self, **progress):
+        self.progress.update(progress)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "meta": self.meta,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """In-process job runner backed by a bounded thread pool.
+
+    No broker: jobs live in memory and are lost on restart. Finished jobs are
+    kept for polling until there are more than `max_finished` of them.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, max_finished=200):
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._active = 0
+
+    def submit(self, fn, *args, meta=None, **kwargs):
+        """Run fn(job, *args, **kwargs) on the pool; its return value becomes job.result."""
+        job = Job(meta)
+
+        with self._lock:
+            if self._active >= self.max_pending:
+                raise JobQueueFull(f"{self._active} jobs already queued or running")
+            self._active += 1
+            self._jobs[job.id] = job
+            self._evict_finished()
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active -= 1
+
+    def _evict_finished(self):
+        finished = [j.id for j in self._jobs.values() if j.status in (DONE, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def list(self, status=None, limit=50):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if status:
+            jobs = [j for j in jobs if j.status == status]
+        # newest first
+        return [j.to_dict() for j in reversed(jobs[-limit:])] if limit else []
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for j in jobs:
+            counts[j.status] += 1
+        return dict(counts, max_pending=self.max_pending)
+
+
+analysis_jobs = JobManager(
+    max_workers=int(os.getenv("ANALYSIS_WORKERS", "2")),
+    max_pending=int(os.getenv("ANALYSIS_MAX_PENDING", "16")),
+)
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+import psutil
+from ultralytics import YOLO
+
+DEFAULT_WEIGHTS = "./models/yolov8n.pt"
+DEFAULT_DEVICE = os.getenv("YOLO_DEVICE", "cpu")
+
+
+class SharedModel:
+    """YOLO wrapper that serialises inference calls.
+
+    Ultralytics keeps predictor state on the model object, so two threads
+    calling the same instance at once can corrupt each other's results.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            results = self.model(*args, **kwargs)
+            if kwargs.get("stream"):
+                # A stream is a generator that only runs inference while it is
+                # iterated, so drain it here or it would run outside the lock
+                results = list(results)
+            return results
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+class ModelRegistry:
+    """Process-wide cache of YOLO models keyed by (weights path, device).
+
+    Flask serves requests from several threads, so loads are serialised per
+    key and every cached model is shared by all of them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._models = {}
+        self._stats = {}
+
+    @staticmethod
+    def _key(weights, device):
+        return os.path.abspath(weights), device
+
+    def _lock_for(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, weights=DEFAULT_WEIGHTS, device=DEFAULT_DEVICE):
+        key = self._key(weights, device)
+
+        model = self._models.get(key)
+        if model is not None:
+            self._count_hit(key)
+            return model
+
+        # Only one thread loads a given key, the others wait for it
+        with self._lock_for(key):
+            model = self._models.get(key)
+            if model is None:
+                return self._load(key)
+            self._count_hit(key)
+            return model
+
+    def _count_hit(self, key):
+        entry = self._stats.get(key)
+        if entry is not None:
+            entry["hits"] += 1
+
+    def _load(self, key):
+        weights, device = key
+
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+
+        start = time.perf_counter()
+        model = YOLO(weights)
+        model.to(device)
+        load_seconds = time.perf_counter() - start
+
+        rss_delta = process.memory_info().rss - rss_before
+
+        self._models[key] = SharedModel(model)
+        self._stats[key] = {
+            "weights": weights,
+            "device": device,
+            "load_seconds": round(load_seconds, 4),
+            "warmup_seconds": None,
+            "parameter_bytes": _parameter_bytes(model),
+            "weights_file_bytes": os.path.getsize(weights),
+            "rss_delta_bytes": rss_delta,
+            "hits": 0,
+            "loaded_at": time.time(),
+        }
+
+        print(
+            f"✅ Loaded {weights} on {device} in {load_seconds:.2f}s "
+            f"(rss +{rss_delta / 1e6:.1f} MB)"
+        )
+        return self._models[key]
+
+    def warmup(self, weights=DEFAULT_WEIGHTS, device=DEFAULT_DEVICE, imgsz=640):
+        """Load the model and push one blank frame through it."""
+        model = self.get(weights, device)
+        key = self._key(weights, device)
+
+        dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        start = time.perf_counter()
+        model(dummy, verbose=False)
+        self._stats[key]["warmup_seconds"] = round(time.perf_counter() - start, 4)
+
+        return model
+
+    def reload(self, weights=DEFAULT_WEIGHTS, device=DEFAULT_DEVICE):
+        """Drop the cached model (e.g. after the weights file changed) and load it again."""
+        key = self._key(weights, device)
+        with self._lock_for(key):
+            self._models.pop(key, None)
+            self._stats.pop(key, None)
+            return self._load(key)
+
+    def evict(self, weights=DEFAULT_WEIGHTS, device=DEFAULT_DEVICE):
+        key = self._key(weights, device)
+        with self._lock_for(key):
+            self._stats.pop(key, None)
+            return self._models.pop(key, None) is not None
+
+    def stats(self):
+        return [dict(entry) for entry in self._stats.values()]
+
+
+_digests = {}
+
+
+def weights_digest(weights=DEFAULT_WEIGHTS):
+    """SHA-256 of a weights file, recomputed only when the file changes."""
+    path = os.path.abspath(weights)
+    st = os.stat(path)
+    marker = (st.st_size, st.st_mtime_ns)
+
+    cached = _digests.get(path)
+    if cached and cached[0] == marker:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    _digests[path] = (marker, digest.hexdigest())
+    return _digests[path][1]
+
+
+def _parameter_bytes(model):
+    try:
+        return sum(p.numel() * p.element_size() for p in model.model.parameters())
+    except AttributeError:
+        return None
+
+
+# Shared by every blueprint and worker thread
+model_registry = ModelRegistry()
+
+
+def get_model(weights=DEFAULT_WEIGHTS, device=DEFAULT_DEVICE):
+    return model_registry.get(weights, device)
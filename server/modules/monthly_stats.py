@@ -0,0 +1,149 @@
+from collections import Counter
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+STATS_COLLECTION = "accident_monthly_stats"
+MIGRATIONS_COLLECTION = "schema_migrations"
+BACKFILL_MIGRATION = "monthly_stats_v1"
+
+# -----------------------------
+# MATERIALIZED MONTHLY SUMMARY
+# -----------------------------
+# One document per month, _id "YYYY-MM":
+#   {"_id": "2024-03", "year": 2024, "month": 3, "count": 12,
+#    "cities": {"Bangalore": 9, ...}, "severities": {"High": 4, ...}}
+# Writers $inc it next to every accident insert, so the summary endpoint
+# reads a handful of documents instead of aggregating the whole collection.
+
+
+def _field(value):
+    # City / severity names become field names: no dots or leading $
+    return str(value or "Unknown").replace(".", "_").replace("$", "_")
+
+
+def _month_id(year, month):
+    return f"{year}-{month:02d}"
+
+
+def _increment(year, month, counts):
+    inc = {"count": sum(counts.values())}
+    for (city, severity), n in counts.items():
+        inc[f"cities.{_field(city)}"] = inc.get(f"cities.{_field(city)}", 0) + n
+        inc[f"severities.{_field(severity)}"] = inc.get(f"severities.{_field(severity)}", 0) + n
+
+    return UpdateOne(
+        {"_id": _month_id(year, month)},
+        {"$inc": inc, "$setOnInsert": {"year": year, "month": month}},
+        upsert=True,
+    )
+
+
+def record_accidents(db, docs):
+    """Fold freshly inserted accident documents into the monthly stats."""
+    by_month = {}
+    for doc in docs:
+        date = doc.get("date")
+        if not isinstance(date, datetime):
+            continue
+        by_month.setdefault((date.year, date.month), Counter())[(doc.get("city"), doc.get("severity"))] += 1
+
+    if by_month:
+        db[STATS_COLLECTION].bulk_write(
+            [_increment(year, month, counts) for (year, month), counts in by_month.items()],
+            ordered=False,
+        )
+
+
+def record_accident(db, doc):
+    record_accidents(db, [doc])
+
+
+def monthly_summary(db, breakdown=False):
+    projection = None if breakdown else {"count": 1}
+
+    data = []
+    for item in db[STATS_COLLECTION].find({}, projection).sort("_id", 1):
+        row = {"month": item["_id"], "count": item["count"]}
+        if breakdown:
+            row["cities"] = item.get("cities", {})
+            row["severities"] = item.get("severities", {})
+        data.append(row)
+    return data
+
+
+# -----------------------------
+# ONE-OFF BACKFILL MIGRATION
+# -----------------------------
+def _parse_legacy_date(value):
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def normalize_legacy_dates(db):
+    """Rewrite string dates on accident_results as real Dates."""
+    accidents = db["accident_results"]
+    ops = []
+    skipped = 0
+
+    for doc in accidents.find({"date": {"$type": "string"}}, {"date": 1}):
+        parsed = _parse_legacy_date(doc["date"])
+        if parsed is None:
+            skipped += 1
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"date": parsed}}))
+
+    if ops:
+        accidents.bulk_write(ops, ordered=False)
+    return len(ops), skipped
+
+
+def rebuild_monthly_stats(db):
+    pipeline = [
+        {"$match": {"date": {"$type": "date"}}},
+        {"$group": {
+            "_id": {
+                "year": {"$year": "$date"},
+                "month": {"$month": "$date"},
+                "city": "$city",
+                "severity": "$severity",
+            },
+            "count": {"$sum": 1},
+        }},
+    ]
+
+    by_month = {}
+    for item in db["accident_results"].aggregate(pipeline):
+        key = item["_id"]
+        by_month.setdefault((key["year"], key["month"]), Counter())[(key.get("city"), key.get("severity"))] += item["count"]
+
+    db[STATS_COLLECTION].delete_many({})
+    if by_month:
+        db[STATS_COLLECTION].bulk_write(
+            [_increment(year, month, counts) for (year, month), counts in by_month.items()],
+            ordered=False,
+        )
+    return len(by_month)
+
+
+def backfill_monthly_stats(db, force=False):
+    migrations = db[MIGRATIONS_COLLECTION]
+    if not force and migrations.find_one({"_id": BACKFILL_MIGRATION}):
+        return None
+
+    normalized, skipped = normalize_legacy_dates(db)
+    months = rebuild_monthly_stats(db)
+
+    migrations.replace_one(
+        {"_id": BACKFILL_MIGRATION},
+        {"_id": BACKFILL_MIGRATION, "applied_at": datetime.utcnow(),
+         "normalized_dates": normalized, "unparseable_dates": skipped, "months": months},
+        upsert=True,
+    )
+    print(f"✅ Monthly stats backfilled: {months} months, {normalized} dates normalized, {skipped} unparseable")
+    return {"months": months, "normalized": normalized, "unparseable": skipped}
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+from flask import Request, current_app
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "200")) * 1024 * 1024
+
+StoredUpload = namedtuple(
+    "StoredUpload", ["name", "path", "content_hash", "size", "deduplicated"]
+)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class HashingUploadFile:
+    """Spool file for one multipart upload, created directly in upload_dir.
+
+    Werkzeug's form parser writes the file part into it, and it hashes on
+    the way in, so save_upload() only has to rename it into place instead of
+    copying the body a second time. Unclaimed files are removed on close().
+    """
+
+    def __init__(self, upload_dir):
+        os.makedirs(upload_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+        self.upload_dir = upload_dir
+        self._file = os.fdopen(fd, "w+b")
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.claimed = False
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def close(self):
+        self._file.close()
+        if not self.claimed and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        # read / seek / tell / flush ... for FileStorage and the parser
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """Request whose file parts are spooled into UPLOAD_FOLDER as HashingUploadFiles."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingUploadFile(current_app.config["UPLOAD_FOLDER"])
+
+
+def _store(tmp_path, upload_dir, content_hash, extension, size):
+    name = f"{content_hash}{extension.lower()}"
+    path = os.path.join(upload_dir, name)
+
+    if os.path.exists(path):
+        os.remove(tmp_path)
+        return StoredUpload(name, path, content_hash, size, True)
+
+    os.replace(tmp_path, path)
+    return StoredUpload(name, path, content_hash, size, False)
+
+
+def save_upload(stream, upload_dir, extension=".mp4", chunk_size=CHUNK_SIZE, max_bytes=MAX_UPLOAD_BYTES):
+    """Store an upload under its SHA-256.
+
+    The file is stored as <sha256><extension>, so the same clip uploaded
+    under another name reuses the existing copy instead of writing a new one.
+    A HashingUploadFile already on disk in upload_dir is renamed into place;
+    any other stream is copied to disk, hashing while writing.
+    """
+    if isinstance(stream, HashingUploadFile) and os.path.samefile(stream.upload_dir, upload_dir):
+        if stream.size > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+        stream.flush()
+        # From here on the file is ours; close() must not delete it
+        stream.claimed = True
+        return _store(stream.path, upload_dir, stream.digest.hexdigest(), extension, stream.size)
+
+    os.makedirs(upload_dir, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+
+                digest.update(chunk)
+                out.write(chunk)
+
+        return _store(tmp_path, upload_dir, digest.hexdigest(), extension, size)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,168 @@
+import socket
+import time
+from email import message_from_string
+from email.header import decode_header, make_header
+
+import pytest
+from aiosmtpd.controller import Controller
+from flask import Flask
+
+from extensions import mail
+from modules.alert_dispatcher import AlertDispatcher
+
+SENDER = "alerts@example.com"
+RECIPIENTS = ["ops@example.com"]
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content.decode())
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def subjects(handler):
+    return [str(make_header(decode_header(message_from_string(m)["Subject"]))) for m in handler.messages]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def alert(lat, lon, severity="90", location="MG Road"):
+    return {"latitude": lat, "longitude": lon, "severity": severity, "location": location}
+
+
+@pytest.fixture
+def smtp():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield handler, controller
+    controller.stop()
+
+
+@pytest.fixture
+def make_dispatcher(smtp):
+    _, controller = smtp
+    dispatchers = []
+
+    def make(port=controller.port, **kwargs):
+        app = Flask(__name__)
+        app.config.update(
+            MAIL_SERVER=controller.hostname,
+            MAIL_PORT=port,
+            MAIL_USE_SSL=False,
+            MAIL_USE_TLS=False,
+        )
+        mail.init_app(app)
+
+        dispatcher = AlertDispatcher(**kwargs)
+        dispatcher.init_app(app)
+        dispatchers.append(dispatcher)
+        return dispatcher
+
+    yield make
+    for dispatcher in dispatchers:
+        dispatcher.close(timeout=2)
+
+
+def test_burst_for_one_location_is_coalesced_into_a_digest(smtp, make_dispatcher):
+    handler, _ = smtp
+    dispatcher = make_dispatcher(coalesce_seconds=0.5)
+
+    # Leading edge: the first alert for a location goes out right away
+    assert dispatcher.submit(alert(12.9716, 77.5946), SENDER, RECIPIENTS) == {"queued": True, "coalesced": False}
+    assert wait_for(lambda: len(handler.messages) == 1)
+
+    # The rest of the burst is held for the window, then sent as one digest
+    results = [dispatcher.submit(alert(12.9716, 77.5946, severity=str(91 + i)), SENDER, RECIPIENTS)
+               for i in range(4)]
+    assert [r["coalesced"] for r in results] == [False, True, True, True]
+
+    # Another location is not held back by the first one's window
+    dispatcher.submit(alert(13.5, 77.0, location="Elsewhere"), SENDER, RECIPIENTS)
+    assert wait_for(lambda: len(handler.messages) == 2)
+    assert "Elsewhere" in handler.messages[1]
+
+    assert wait_for(lambda: len(handler.messages) == 3)
+    time.sleep(0.7)
+    assert len(handler.messages) == 3
+    assert "4 Accident Alerts" in subjects(handler)[2]
+
+    stats = dispatcher.stats()
+    assert stats["submitted"] == 6
+    assert stats["coalesced"] == 3
+    assert stats["sent"] == 3
+    assert stats["alerts_sent"] == 6
+    # Every mail went over one kept-alive SMTP connection
+    assert stats["connections_opened"] == 1
+    assert len(handler.sessions) == 1
+
+
+def test_rate_limit_holds_mail_per_recipient(smtp, make_dispatcher):
+    handler, _ = smtp
+    dispatcher = make_dispatcher(coalesce_seconds=0.0, rate_limit=2, rate_window=60.0)
+
+    for i in range(4):
+        dispatcher.submit(alert(10 + i, 10 + i, location=f"Place {i}"), SENDER, RECIPIENTS)
+
+    assert wait_for(lambda: len(handler.messages) == 2)
+    time.sleep(0.3)
+    assert len(handler.messages) == 2
+
+    stats = dispatcher.stats()
+    assert stats["rate_limited"] >= 1
+    assert stats["pending_digests"] == 2
+
+
+def test_send_failures_are_retried_then_dropped(smtp, make_dispatcher):
+    handler, _ = smtp
+    # Nothing listens on this port
+    dispatcher = make_dispatcher(port=free_port(), max_retries=2, retry_delay=0.05)
+
+    dispatcher.submit(alert(1, 1), SENDER, RECIPIENTS)
+
+    assert wait_for(lambda: dispatcher.stats()["failed"] == 1)
+    stats = dispatcher.stats()
+    assert stats["retries"] == 2
+    assert stats["sent"] == 0
+    assert handler.messages == []
+
+
+def test_unexpected_errors_are_retried_and_the_worker_survives(smtp, make_dispatcher):
+    handler, _ = smtp
+    dispatcher = make_dispatcher(coalesce_seconds=0.0, max_retries=2, retry_delay=0.05)
+
+    send = dispatcher._send
+    failures = [RuntimeError("template blew up")]
+
+    def flaky_send(digest):
+        if failures:
+            raise failures.pop()
+        send(digest)
+
+    dispatcher._send = flaky_send
+    dispatcher.submit(alert(1, 1), SENDER, RECIPIENTS)
+
+    assert wait_for(lambda: len(handler.messages) == 1)
+    assert dispatcher.stats()["retries"] == 1
+
+    # The worker is still alive for the next alert
+    dispatcher.submit(alert(2, 2, location="Elsewhere"), SENDER, RECIPIENTS)
+    assert wait_for(lambda: len(handler.messages) == 2)
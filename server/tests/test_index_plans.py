@@ -0,0 +1,55 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from modules.indexes import bootstrap_indexes
+
+# mongomock has no query planner, so the plans are checked against a real
+# mongod; point MONGO_TEST_URI at one to run these
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI", "mongodb://127.0.0.1:27017")
+
+
+@pytest.fixture(scope="module")
+def plans():
+    client = MongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        client.close()
+        pytest.skip(f"no mongod at {MONGO_TEST_URI}: {e}")
+
+    name = f"test_index_plans_{uuid.uuid4().hex[:8]}"
+    db = client[name]
+    try:
+        start = datetime(2026, 1, 1)
+        db["accident_results"].insert_many([
+            {"city": f"city-{i % 7}", "severity": ("High", "Low")[i % 2], "date": start + timedelta(hours=i)}
+            for i in range(200)
+        ])
+        db["users"].insert_many([{"email": f"user{i}@example.com"} for i in range(20)])
+
+        yield bootstrap_indexes(db)["plans"]
+    finally:
+        client.drop_database(name)
+        client.close()
+
+
+@pytest.mark.parametrize("query, index", [
+    ("login", "email_unique"),
+    ("all", "date_desc"),
+    ("all_by_city", "city_date_desc"),
+    ("all_by_severity", "severity_date_desc"),
+])
+def test_main_queries_scan_their_index(plans, query, index):
+    plan = plans[query]
+
+    assert "error" not in plan, plan
+    assert "IXSCAN" in plan["stages"], plan
+    assert "COLLSCAN" not in plan["stages"], plan
+    # Walking the index in order means no in-memory sort
+    assert "SORT" not in plan["stages"], plan
+    assert plan["indexes"] == [index], plan
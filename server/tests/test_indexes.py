@@ -0,0 +1,97 @@
+import mongomock
+import pytest
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+from modules.indexes import INDEXES, _plan_summary, bootstrap_indexes, verify_indexes
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().db
+
+
+def test_bootstrap_creates_every_declared_index(db):
+    report = bootstrap_indexes(db)
+
+    assert report["missing"] == {}
+    assert verify_indexes(db) == {}
+    for collection, models in INDEXES.items():
+        existing = db[collection].index_information()
+        for model in models:
+            assert model.document["name"] in existing
+
+
+def test_index_specs(db):
+    bootstrap_indexes(db)
+
+    users = db["users"].index_information()
+    assert list(users["email_unique"]["key"]) == [("email", ASCENDING)]
+    assert users["email_unique"]["unique"] is True
+
+    accidents = db["accident_results"].index_information()
+    assert list(accidents["date_desc"]["key"]) == [("date", DESCENDING), ("_id", DESCENDING)]
+    assert list(accidents["city_date_desc"]["key"]) == [("city", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)]
+    assert list(accidents["severity_date_desc"]["key"]) == [
+        ("severity", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING),
+    ]
+
+    event_id = accidents["event_id_unique"]
+    assert list(event_id["key"]) == [("event_id", ASCENDING)]
+    assert event_id["unique"] is True
+    assert event_id["sparse"] is True
+
+
+def test_bootstrap_is_idempotent(db):
+    bootstrap_indexes(db)
+    assert bootstrap_indexes(db)["missing"] == {}
+
+
+def test_event_id_index_dedups_but_allows_records_without_one(db):
+    bootstrap_indexes(db)
+    accidents = db["accident_results"]
+
+    accidents.insert_one({"city": "a"})
+    accidents.insert_one({"city": "b"})  # sparse: many records without event_id
+    accidents.insert_one({"event_id": "e1"})
+    with pytest.raises(DuplicateKeyError):
+        accidents.insert_one({"event_id": "e1"})
+
+
+def test_every_main_query_is_reported(db):
+    plans = bootstrap_indexes(db)["plans"]
+
+    assert set(plans) == {"login", "all", "all_by_city", "all_by_severity", "by_id"}
+
+
+def test_plan_summary_walks_the_winning_plan():
+    explain = {
+        "queryPlanner": {
+            "winningPlan": {
+                "queryPlan": {
+                    "stage": "LIMIT",
+                    "inputStage": {
+                        "stage": "FETCH",
+                        "inputStage": {"stage": "IXSCAN", "indexName": "city_date_desc"},
+                    },
+                },
+            },
+        },
+        "executionStats": {"nReturned": 3, "totalKeysExamined": 3, "totalDocsExamined": 3},
+    }
+
+    assert _plan_summary(explain) == {
+        "stages": ["LIMIT", "FETCH", "IXSCAN"],
+        "indexes": ["city_date_desc"],
+        "returned": 3,
+        "keys_examined": 3,
+        "docs_examined": 3,
+    }
+
+
+def test_plan_summary_flags_a_collection_scan():
+    explain = {"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}}
+
+    summary = _plan_summary(explain)
+    assert summary["stages"] == ["SORT", "COLLSCAN"]
+    assert summary["indexes"] == []
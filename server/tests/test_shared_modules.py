@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+SERVER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EDGE = os.path.join(os.path.dirname(SERVER), "model-implementor")
+
+# server/modules/<name> is canonical; model-implementor/modules/<name> is a copy
+SHARED = ["geometry.py", "geocode.py"]
+
+
+@pytest.mark.parametrize("name", SHARED)
+def test_edge_copy_matches_the_server_module(name):
+    copy = os.path.join(EDGE, "modules", name)
+    if not os.path.exists(copy):
+        pytest.skip("model-implementor is not checked out next to server")
+
+    with open(os.path.join(SERVER, "modules", name), "rb") as f:
+        canonical = f.read()
+    with open(copy, "rb") as f:
+        assert f.read() == canonical, f"model-implementor/modules/{name} drifted; copy server/modules/{name} over it"